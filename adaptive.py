@@ -0,0 +1,95 @@
+import math
+import os
+import random
+from statistics import NormalDist
+
+import tracing
+
+# Adaptive early stopping for the per-category counting in winners, nominees
+# and presenters. The category's tweets are shuffled (seeded per category, so
+# runs repeat) and counted over prefixes of doubling size; after each round
+# the selection the module makes from its counts (everything above a fraction
+# of the leader, or the top k) is tested, and counting stops once every
+# candidate sits on its side of that cut with the given confidence (a one-sided
+# binomial test on each boundary pair). spaCy results are cached per text, so
+# a larger round only tags the new tweets. A category that never settles ends
+# with a count over all its tweets in their original order. Answers from a
+# settled prefix are likely, not certain, to match the full count: the test
+# covers the candidates the prefix has seen, and one it never saw is only
+# treated as a zero count. Off by default; enable with GG_ADAPTIVE=1 (or
+# GG_ADAPTIVE=<confidence>) or gg_api.py --adaptive [confidence].
+
+CONFIDENCE = 0.99
+FIRST_ROUND = 128
+SEED = 0
+
+
+def _from_env():
+    v = os.environ.get('GG_ADAPTIVE', '')
+    if not v:
+        return None
+    return CONFIDENCE if v == '1' else float(v)
+
+
+LEVEL = _from_env()
+ENABLED = LEVEL is not None
+
+
+def enable(confidence=None):
+    global ENABLED, LEVEL
+    ENABLED = True
+    LEVEL = float(confidence) if confidence else (LEVEL or CONFIDENCE)
+
+
+def _apart(hi, lo, ratio, z):
+    """Is lo / hi significantly below `ratio` (lo, hi counts of two candidates)."""
+    n = hi + lo
+    if n == 0 or ratio <= 0:
+        return False
+    p0 = ratio / (1.0 + ratio)
+    return (p0 - lo / n) / math.sqrt(p0 * (1.0 - p0) / n) >= z
+
+
+def settled(counts, ratio=0.0, cap=None, confidence=None):
+    """Is the selection "count > ratio * max, the top cap of them by count" stable at this confidence."""
+    z = NormalDist().inv_cdf(confidence or LEVEL or CONFIDENCE)
+    vals = sorted((v for v in counts.values() if v > 0), reverse=True)
+    if not vals:
+        return False
+    lead = vals[0]
+    kept = [v for v in vals if v > ratio * lead]
+    if cap is not None and len(kept) > cap:
+        # more pass the cut than fit: the cap boundary has to be clear
+        return _apart(kept[cap - 1], kept[cap], 1.0, z)
+    # best one left out; 0 stands for a candidate the prefix has not seen yet
+    out = vals[len(kept)] if len(kept) < len(vals) else 0
+    if ratio <= 0:
+        # a plain top-cap with room to spare: the weakest kept one must clearly beat it
+        return _apart(kept[-1], out, 1.0, z)
+    if not _apart(lead, out, ratio, z):
+        return False
+    # the weakest kept one must be clearly above the cut
+    return len(kept) == 1 or _apart(kept[-1], lead * ratio, 1.0, z)
+
+
+def settle(items, key, count, ratio=0.0, cap=None, counts=None):
+    """count(items), or count() over the smallest random prefix of items whose selection is settled.
+
+    counts turns count's result into the {candidate: count} dict to test (default: the result itself).
+    count sees only the prefix, so any absolute count threshold it applies should be scaled by
+    len(prefix) / len(items)."""
+    if not ENABLED or len(items) <= FIRST_ROUND:
+        return count(items)
+    order = list(items)
+    random.Random(f'{SEED}:{key}').shuffle(order)
+    n = FIRST_ROUND
+    while n < len(order):
+        res = count(order[:n])
+        tracing.count('adaptive.rounds')
+        if settled(res if counts is None else counts(res), ratio, cap):
+            tracing.count('adaptive.used', n)
+            tracing.count('adaptive.skipped', len(order) - n)
+            return res
+        n *= 2
+    tracing.count('adaptive.used', len(order))
+    return count(items)
@@ -0,0 +1,202 @@
+import glob
+import hashlib
+import json
+import os
+import pickle
+import time
+
+# Per-year artifact bundle compiled by gg_api.pre_ceremony (opt-in: --artifacts
+# or GG_ARTIFACTS=1). It holds the interned tweet store as memory-mappable
+# arrays, each module's cleaned text per distinct tweet (and awards' harvest),
+# per-category routing lists (the distinct texts each module's filter keeps),
+# and the spaCy work: tagging annotations for winners/nominees and presenter
+# name extractions. Modules pick it up through tweet_store.load and load(),
+# so a getter only aggregates. A bundle is used only while the corpus file and
+# the pipeline sources match what it was built from.
+#
+# There is no separate token index: every module filter is a substring or
+# regex test, so routing lists are what actually replaces the scans.
+
+ARTIFACT_DIR = os.path.join('.gg_cache', 'artifacts')
+_VERSION = None
+_BUNDLES = {}
+
+
+def pipeline_version():
+    """Hash of the pipeline sources next to this file; any code edit changes it."""
+    global _VERSION
+    if _VERSION is None:
+        here = os.path.dirname(os.path.abspath(__file__))
+        h = hashlib.sha1()
+        for p in sorted(glob.glob(os.path.join(here, '*.py'))):
+            if os.path.basename(p) == 'autograder.py':
+                continue
+            with open(p, 'rb') as f:
+                h.update(f.read())
+        _VERSION = h.hexdigest()
+    return _VERSION
+
+
+def _stamp(year):
+    import corpus
+    path = corpus.path(year)
+    st = os.stat(path)
+    return [os.path.abspath(path), st.st_size, st.st_mtime_ns]
+
+
+def _model_id(nlp):
+    meta = getattr(nlp, 'meta', {}) or {}
+    return f"{meta.get('lang')}_{meta.get('name')}-{meta.get('version')}"
+
+
+class Bundle:
+    __slots__ = ('manifest', 'store', 'routes', 'annotations', 'persons')
+
+    def __init__(self, manifest, store, routes, annotations, persons):
+        self.manifest = manifest
+        self.store = store
+        self.routes = routes
+        self.annotations = annotations
+        self.persons = persons
+
+    def model_ok(self, nlp):
+        return self.manifest.get('model') == _model_id(nlp)
+
+    def routed(self, module, category):
+        """Cleaned texts, one per tweet in file order, that module's filter keeps for category."""
+        import numpy as np
+        ids = self.routes.get(module, {}).get(category)
+        if ids is None:
+            return None
+        import langfilter
+        if langfilter.ENABLED:
+            ids = ids[langfilter.keep([self.store.unique_text(j) for j in ids.tolist()])]
+        done = self.store.derived[self.manifest['cleaners'][module]]
+        tids = self.store.text_ids
+        return [done[j] for j in tids[np.isin(tids, ids)].tolist()]
+
+    def preload_annotations(self, nlp):
+        if self.annotations is not None and self.model_ok(nlp):
+            import tagging
+            tagging.preload(*self.annotations)
+
+
+def load(year):
+    """The compiled bundle for year, or None if there is none or it is stale."""
+    try:
+        stamp = _stamp(year)
+    except OSError:
+        return None
+    hit = _BUNDLES.get(str(year))
+    if hit is not None and hit[0] == stamp:
+        return hit[1]
+    bundle = None
+    d = os.path.join(ARTIFACT_DIR, str(year))
+    try:
+        with open(os.path.join(d, 'manifest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('stamp') == stamp and manifest.get('version') == pipeline_version():
+            import tweet_store
+            with open(os.path.join(d, 'derived.pkl'), 'rb') as f:
+                derived = pickle.load(f)
+            store = tweet_store.open_saved(os.path.join(d, 'store'), derived.pop('clean'))
+            bundle = Bundle(manifest, store, derived['routes'], derived['annotations'], derived['persons'])
+    except (OSError, ValueError, KeyError, pickle.UnpicklingError, EOFError):
+        bundle = None
+    _BUNDLES[str(year)] = (stamp, bundle)
+    return bundle
+
+
+def saved_store(year, key):
+    """Store from a valid bundle whose corpus stamp equals tweet_store's key, else None."""
+    bundle = load(year)
+    if bundle is None or tuple(bundle.manifest['stamp']) != tuple(key):
+        return None
+    return bundle.store
+
+
+def _route(contain, args, cleaned):
+    import numpy as np
+    kept = set(contain(*args, cleaned))
+    return np.array([j for j, t in enumerate(cleaned) if t in kept], dtype=np.int32)
+
+
+def compile(year, nlp=None):
+    """Build the bundle for year under .gg_cache/artifacts/<year>/; returns its directory."""
+    import pandas as pd
+    import spacy
+    import awards
+    import corpus
+    import hashtags
+    import hosts
+    import nominees
+    import presenters
+    import tagging
+    import tweet_store
+    import winners
+    from award_plans import AWARD_NAMES, build_plans, get_plan
+
+    start = time.time()
+    stamp = _stamp(year)
+    nlp = nlp or spacy.load('en_core_web_sm')
+    with corpus.open_text(tweet_store.corpus_path(year)) as fh:
+        store = tweet_store.build(tweet_store.iter_records(fh))
+    hashtags.build(store)
+
+    cleaners = {
+        'hosts': hosts.remove_symbols,
+        'awards': awards._harvest,
+        'winners': winners._clean,
+        'nominees': nominees._clean_text,
+        'presenters': presenters.clean_text,
+    }
+    keys = {m: tweet_store.fn_key(fn) for m, fn in cleaners.items()}
+    clean = {keys[m]: store.unique_results(fn) for m, fn in cleaners.items()}
+
+    build_plans(AWARD_NAMES)
+    routes = {'winners': {}, 'nominees': {}, 'presenters': {}}
+    for cat in AWARD_NAMES:
+        routes['winners'][cat] = _route(winners.tweets_contain, (cat,), clean[keys['winners']])
+        routes['nominees'][cat] = _route(nominees.tweets_contain, (cat,), clean[keys['nominees']])
+        routes['presenters'][cat] = _route(
+            lambda kw, texts: presenters.get_tweets(kw, pd.DataFrame({'text': texts}))['text'],
+            (get_plan(cat).presenter_keywords,), clean[keys['presenters']])
+
+    # the spaCy passes: every distinct routed text winners/nominees will tag,
+    # and presenters' name extraction (filled by one run over the cleaned data)
+    tagged = {}
+    for m in ('winners', 'nominees'):
+        done = clean[keys[m]]
+        for ids in routes[m].values():
+            tagged.update(dict.fromkeys(done[j] for j in ids.tolist()))
+    tagging.annotate(list(tagged), nlp)
+    store.derived = clean
+    presenters._PERSONS.clear()
+    data = presenters.get_tweet_data(year, store)
+    draft = Bundle({'cleaners': keys}, store, routes, None, None)
+    for cat in AWARD_NAMES:
+        presenters.get_presenters(cat, data, nlp=nlp, routed=draft.routed('presenters', cat))
+    store.derived = {}
+
+    d = os.path.join(ARTIFACT_DIR, str(year))
+    tmp = d + '.tmp'
+    if os.path.isdir(tmp):
+        import shutil
+        shutil.rmtree(tmp)
+    tweet_store.save(store, os.path.join(tmp, 'store'))
+    with open(os.path.join(tmp, 'derived.pkl'), 'wb') as f:
+        pickle.dump({'clean': clean, 'routes': routes, 'annotations': tagging.export(),
+                     'persons': dict(presenters._PERSONS)}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    manifest = {
+        'year': str(year), 'stamp': stamp, 'version': pipeline_version(), 'model': _model_id(nlp),
+        'cleaners': keys, 'tweets': len(store), 'unique': store.n_unique,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'build_s': round(time.time() - start, 1),
+    }
+    with open(os.path.join(tmp, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    if os.path.isdir(d):
+        import shutil
+        shutil.rmtree(d)
+    os.replace(tmp, d)
+    _BUNDLES.pop(str(year), None)
+    return d
@@ -7,8 +7,14 @@ import json
 import difflib
 from pprint import pprint
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 
-from nltk.metrics import edit_distance
+try:
+    # C implementation; same plain Levenshtein distance as nltk's edit_distance defaults
+    from Levenshtein import distance as edit_distance
+except ImportError:
+    from nltk.metrics import edit_distance
 
 import gg_api
 
@@ -21,6 +27,7 @@ def norm_text(textstring):
     return "".join([c.lower() for c in textstring if c.isalnum() or c.isspace()])
 
 
+@lru_cache(maxsize=1 << 16)
 def text(resultstr, answerstr):
     """Accepts two normalized texts, as output by the norm_text
     function, and returns a score based on the match length relative
@@ -164,63 +171,105 @@ def calc_score(result, answer):
     return (len_intersection / float(len_union)) * m
 
 
-def score_structured(year, answers, info_type):
-    # c_score is the completeness score
-    spelling_score = 0
-    c_score = 0
-    results = getattr(gg_api, 'get_%s' % info_type)(year)
-    length = 26
-
-    if info_type == "nominees":
-        tempans = answers['award_data']['cecil b. demille award']
-        del answers['award_data']['cecil b. demille award']
-        tempres = results['cecil b. demille award']
-        del results['cecil b. demille award']
-        length = 25
-
-    for a in answers['award_data']:
-        if info_type == 'winner':
-            temp_spelling, translation = calc_translation([results[a]], [answers['award_data'][a][info_type]])
-        else:
-            temp_spelling, translation = calc_translation(results[a], answers['award_data'][a][info_type])
-            c_score += calc_score([translation[res] if res in translation else res for res in results[a]], answers['award_data'][a][info_type])
-        spelling_score += temp_spelling
+CECIL = 'cecil b. demille award'
+
+
+def _award_score(info_type, result, answer):
+    """(spelling, completeness) of one award's result."""
+    if info_type == 'winner':
+        spelling, _ = calc_translation([result], [answer])
+        return spelling, 0
+    spelling, translation = calc_translation(result, answer)
+    return spelling, calc_score([translation[res] if res in translation else res for res in result], answer)
+
+
+def _unstructured_score(results, answer):
+    spelling_score, translation = calc_translation(results, answer)
+    c_score = calc_score([translation[res] if res in translation else res for res in results], answer)
+    return spelling_score, c_score
 
-    if info_type == "nominees":
-        answers['award_data']['cecil b. demille award'] = tempans
-        results['cecil b. demille award'] = tempres
 
+def _units(answers, info_type, results):
+    """(fn, args) scoring units for one part; structured parts are graded award by award."""
+    if info_type in ['hosts', 'awards']:
+        return [(_unstructured_score, (results, answers[info_type]))]
+    # the cecil b. demille award has no nominees to grade
+    return [(_award_score, (info_type, results[a], answers['award_data'][a][info_type]))
+            for a in answers['award_data'] if not (info_type == 'nominees' and a == CECIL)]
+
+
+def _combine(info_type, scored):
+    if info_type in ['hosts', 'awards']:
+        return scored[0]
+    # c_score is the completeness score
+    length = 25 if info_type == 'nominees' else 26
+    spelling_score = c_score = 0
+    for s, c in scored:
+        spelling_score += s
+        c_score += c
     return spelling_score/length, c_score/length
 
 
-def score_unstructured(year, answers, info_type):
-    results = getattr(gg_api, 'get_%s' % info_type)(year)
-    spelling_score, translation = calc_translation(results, answers[info_type])
-    c_score = calc_score([translation[res] if res in translation else res for res in results], answers[info_type])
+def get_results(year, info_type):
+    return getattr(gg_api, 'get_%s' % info_type)(year)
 
-    return spelling_score, c_score
 
+def score_structured(year, answers, info_type, results=None):
+    if results is None:
+        results = get_results(year, info_type)
+    return _combine(info_type, [fn(*args) for fn, args in _units(answers, info_type, results)])
 
-def main(grading):
-    years = ['2013']
-    types = ['spelling', 'completeness']
 
-    scores = {y: {g: {t:0 for t in types} for g in grading} for y in years}
-    for y in years:
-        with open('gg%sanswers.json' % y, 'r') as f:
-            answers = json.load(f)
+def score_unstructured(year, answers, info_type, results=None):
+    if results is None:
+        results = get_results(year, info_type)
+    return _unstructured_score(results, answers[info_type])
+
+
+def load_answers(y):
+    with open('gg%sanswers.json' % y, 'r') as f:
+        answers = json.load(f)
+
+    answers['awards'] = list(answers['award_data'].keys())
+    return answers
+
+
+def score_part(y, g, answers=None, results=None):
+    if answers is None:
+        answers = load_answers(y)
+    if g in ['hosts', 'awards']:
+        return score_unstructured(y, answers, g, results)
+    return score_structured(y, answers, g, results)
 
-        answers['awards'] = list(answers['award_data'].keys())
 
-        for g in grading:
-            if g in ['hosts', 'awards']:
-                scores[y][g]['spelling'], scores[y][g]['completeness'] = score_unstructured(y, answers, g)
-            else:
-                scores[y][g]['spelling'], scores[y][g]['completeness'] = score_structured(y, answers, g)
+def main(grading, years=None, workers=1):
+    years = years or ['2013']
+    types = ['spelling', 'completeness']
+
+    scores = {y: {g: {t:0 for t in types} for g in grading} for y in years}
+    if workers > 1:
+        # results are computed (or read from gg_api's cache) once, here; only the
+        # scoring units (calc_translation / spell_check per award) fan out
+        jobs = {}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for y in years:
+                answers = load_answers(y)
+                for g in grading:
+                    units = _units(answers, g, get_results(y, g))
+                    jobs[y, g] = [pool.submit(fn, *args) for fn, args in units]
+            for (y, g), futures in jobs.items():
+                scores[y][g]['spelling'], scores[y][g]['completeness'] = _combine(g, [f.result() for f in futures])
+    else:
+        for y in years:
+            answers = load_answers(y)
+            for g in grading:
+                scores[y][g]['spelling'], scores[y][g]['completeness'] = score_part(y, g, answers)
 
+    for y in years:
         if "winner" in grading:
             del scores[y]['winner']['completeness']
     pprint(scores)
+    return scores
 
 if __name__ == '__main__':
     grading = ["hosts", "awards", "nominees", "presenters", "winner"]
@@ -230,4 +279,13 @@ if __name__ == '__main__':
         if len(newg) > 0:
             grading = newg
 
-    main(grading)
\ No newline at end of file
+    years = [a for a in sys.argv[1:] if a in {'2013', '2015'}] or None
+    workers = 1
+    if '--workers' in sys.argv:
+        i = sys.argv.index('--workers')
+        nxt = sys.argv[i + 1] if i + 1 < len(sys.argv) else ''
+        if not nxt.isdigit() or int(nxt) < 1 or nxt in {'2013', '2015'}:
+            sys.exit('--workers needs a positive number of processes, e.g. --workers 4')
+        workers = int(nxt)
+
+    main(grading, years, workers)
\ No newline at end of file
@@ -0,0 +1,111 @@
+import re
+import string
+
+# Per-award query plans. Everything winners, nominees and presenters derive
+# from an award name (filter regexes, tokens to blank out of the counts,
+# presenter keywords) is computed here once per name and shared.
+
+AWARD_NAMES = [
+    'cecil b. demille award', 'best motion picture - drama',
+    'best performance by an actress in a motion picture - drama',
+    'best performance by an actor in a motion picture - drama',
+    'best motion picture - comedy or musical',
+    'best performance by an actress in a motion picture - comedy or musical',
+    'best performance by an actor in a motion picture - comedy or musical',
+    'best animated feature film', 'best foreign language film',
+    'best performance by an actress in a supporting role in a motion picture',
+    'best performance by an actor in a supporting role in a motion picture',
+    'best director - motion picture', 'best screenplay - motion picture',
+    'best original score - motion picture', 'best original song - motion picture',
+    'best television series - drama',
+    'best performance by an actress in a television series - drama',
+    'best performance by an actor in a television series - drama',
+    'best television series - comedy or musical',
+    'best performance by an actress in a television series - comedy or musical',
+    'best performance by an actor in a television series - comedy or musical',
+    'best mini-series or motion picture made for television',
+    'best performance by an actress in a mini-series or motion picture made for television',
+    'best performance by an actor in a mini-series or motion picture made for television',
+    'best performance by an actress in a supporting role in a series, mini-series or motion picture made for television',
+    'best performance by an actor in a supporting role in a series, mini-series or motion picture made for television'
+]
+
+_WIN_SKIP = {"-", "performance", "comedy", "television"}
+_NOM_SKIP = {"-", "–", "—", "performance", "television", "tv", "series", "motion", "picture", "award"}
+_WIN_EXCLUDE = ["motion", "picture", "golden", "globes", "television", "series", "tv", "mini", "rt"]
+_NOM_EXCLUDE = {"motion", "picture", "golden", "globe", "globes", "television", "series", "tv", "mini"}
+_PRESENTER_DROP = {
+    'best', 'award', 'performance', 'made', 'feature', 'film', 'role', 'motion', 'picture', 'series', 'comedy', 'musical'
+}
+_PRESENTER_REPL = {'television': 'series', 'animated': 'animat', 'supporting': 'support'}
+_PUNCT_TABLE = str.maketrans('', '', string.punctuation)
+
+# substrings presenters looks for in a tweet that names an award's presenter
+PRESENTER_VERBS = [
+    'introduc', 'introduce', 'introduced', 'introducing',
+    'giv', 'give', 'gives', 'gave', 'giving', 'hand', 'hands', 'handed',
+    'present', 'presents', 'presented', 'presenting', 'presenter',
+    'read', 'reads', 'reading',
+    'announc', 'announce', 'announces', 'announced', 'announcing',
+    'presented by', 'announced by', 'introduced by', 'on stage with', 'joined by'
+]
+
+_STOPWORDS = []
+_PLANS = {}
+
+
+def stopwords():
+    if not _STOPWORDS:
+        try:
+            from nltk.corpus import stopwords as sw
+            _STOPWORDS.append(frozenset(sw.words("english")))
+        except LookupError:
+            _STOPWORDS.append(frozenset({"the", "and", "of", "to", "a", "in", "for", "on", "with", "by", "from"}))
+    return _STOPWORDS[0]
+
+
+def simple_tokens(s):
+    return re.findall(r"[A-Za-z]+(?:'[A-Za-z]+)?", s.lower())
+
+
+def _ordered(toks):
+    return re.compile(".*?".join(map(re.escape, toks)), re.IGNORECASE) if toks else None
+
+
+def _any_of(toks):
+    toks = sorted(set(toks), key=len, reverse=True)
+    return re.compile("|".join(map(re.escape, toks))) if toks else None
+
+
+class AwardPlan:
+    __slots__ = (
+        "name", "is_person", "mentions_act", "win_tokens", "nom_tokens", "win_pattern", "nom_pattern",
+        "win_exclude", "nom_exclude", "presenter_keywords",
+    )
+
+    def __init__(self, name):
+        sw = stopwords()
+        low = name.lower()
+        toks = simple_tokens(name)
+        self.name = name
+        self.is_person = "actor" in low or "actress" in low
+        self.mentions_act = "act" in low
+        self.win_tokens = [t for t in toks if t not in sw and t not in _WIN_SKIP]
+        self.nom_tokens = [t for t in toks if t not in sw and t not in _NOM_SKIP]
+        self.win_pattern = _ordered(self.win_tokens)
+        self.nom_pattern = _ordered(self.nom_tokens)
+        self.win_exclude = _any_of([t for t in toks + _WIN_EXCLUDE if t not in sw])
+        self.nom_exclude = _any_of(set(toks) | _NOM_EXCLUDE)
+        words = [w.lower() for w in name.translate(_PUNCT_TABLE).split()]
+        self.presenter_keywords = [_PRESENTER_REPL.get(w, w) for w in words if w not in sw and w not in _PRESENTER_DROP]
+
+
+def get_plan(name):
+    plan = _PLANS.get(name)
+    if plan is None:
+        plan = _PLANS[name] = AwardPlan(name)
+    return plan
+
+
+def build_plans(names=AWARD_NAMES):
+    return [get_plan(n) for n in names]
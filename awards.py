@@ -1,8 +1,15 @@
 import re
-import json
-from collections import Counter
+from functools import lru_cache
 from fuzzywuzzy import fuzz
 
+import hashtags
+import memprof
+import prefilter
+import sketches
+import tracing
+import tweet_store
+import vocab
+
 def remove_symbols(s):
     r = []
     for w in s.split():
@@ -16,80 +23,171 @@ def remove_symbols(s):
         r.append(w)
     return ' '.join(r)
 
+_NORM_MEMO_SIZE = 65536
+_SPACES = re.compile(r'\s+')
+_DASH = re.compile(r'\s*-\s*')
+
+def _rule_table(rules):
+    """Compile ordered (regex, replacement) rules into one alternation applied in a single sub()."""
+    repl = [r for _, r in rules]
+    rx = re.compile('|'.join(f'(?P<r{i}>{src})' for i, (src, _) in enumerate(rules)))
+    pick = lambda m: repl[int(m.lastgroup[1:])]
+    def apply(s):
+        # re-run until stable so chains like "best best the" still collapse fully
+        for _ in range(4):
+            t = rx.sub(pick, s)
+            if t == s:
+                break
+            s = t
+        return s
+    return apply
+
+def _literal(pairs):
+    return [(re.escape(a), b) for a, b in pairs]
+
+# The "animated feature" rules only fire when "film" is not already there,
+# which keeps the table idempotent (re-normalizing a phrase is a no-op).
+_CANON = _rule_table(_literal([
+    (' tv ', ' television '),
+    (' t.v. ', ' television '),
+    (' mini series', ' mini-series'),
+    (' miniseries', ' mini-series'),
+    (' limited series', ' mini-series'),
+    (' foreign film', ' foreign language film'),
+    (' original soundtrack', ' original score'),
+    (' feature animation', ' animated feature film'),
+]) + [(r' animated feature(?! film)', ' animated feature film')])
+
+_POST = _rule_table(_literal([
+    (' best best ', ' best '),
+    (' best the ', ' best '),
+]) + [
+    (r'\bperformance in a\b', ' performance by an '),
+    (r'\bperformance in\b', ' performance by an '),
+] + _literal([
+    (' actor actress ', ' actor '),
+    (' actress actor ', ' actress '),
+    (' best tv ', ' best television '),
+    (' comedy musical', ' comedy or musical'),
+    (' musical comedy', ' comedy or musical'),
+    (' best original soundtrack ', ' best original score '),
+    (' screenplay motion picture', ' screenplay - motion picture'),
+    (' director motion picture', ' director - motion picture'),
+    (' original song motion picture', ' original song - motion picture'),
+    (' original score motion picture', ' original score - motion picture'),
+]) + [(r' best animated feature (?!film\b)', ' best animated feature film ')] + _literal([
+    (' best foreign film ', ' best foreign language film '),
+]))
+
 def _norm(s):
     s = s.lower()
-    s = re.sub(r'\s+', ' ', s.strip())
+    s = _SPACES.sub(' ', s.strip())
     s = s.strip(" ,.:;!?\"'()[]{}_/\\")
-    s = re.sub(r'\s*-\s*', ' - ', s)
-    s = re.sub(r'\s+', ' ', s)
+    s = _DASH.sub(' - ', s)
+    s = _SPACES.sub(' ', s)
     return s
 
 def _canon_award(s):
-    s = s.replace(' tv ', ' television ')
-    s = s.replace(' t.v. ', ' television ')
-    s = s.replace(' motion picture ', ' motion picture ')
-    s = s.replace(' mini series', ' mini-series')
-    s = s.replace(' miniseries', ' mini-series')
-    s = s.replace(' limited series', ' mini-series')
-    s = s.replace(' foreign film', ' foreign language film')
-    s = s.replace(' original soundtrack', ' original score')
-    s = s.replace(' feature animation', ' animated feature film')
-    s = s.replace(' animated feature', ' animated feature film')
-    s = re.sub(r'\s+', ' ', s)
-    return s.strip()
-
-def _split_camel_hashtag(s):
-    if not s or not s.startswith('Best'):
-        return None
-    parts = re.findall(r'[A-Z][a-z]*|[A-Z]+(?![a-z])', s)
-    if len(parts) < 2:
-        return None
-    return 'best ' + ' '.join(p.lower() for p in parts[1:])
+    return _SPACES.sub(' ', _CANON(s)).strip()
+
+_WINDOW_STOP = re.compile(r':|–|—|-|;|,|\.|!|\?| goes to| goes | winner | win | for | at ')
 
 def _slice_window(t, start, maxlen=80):
     end = min(len(t), start + maxlen)
     seg = t[start:end]
-    stop = list(re.finditer(r':|–|—|-|;|,|\.|!|\?| goes to| goes | winner | win | for | at ', seg))
-    if stop:
-        seg = seg[:stop[-1].start()]
+    last = None
+    for last in _WINDOW_STOP.finditer(seg):
+        pass
+    if last is not None:
+        seg = seg[:last.start()]
     return seg
 
-def _patterns():
-    p = []
-    p.append(re.compile(r'\b(best [a-z0-9 ,&/\'\-]+)', re.I))
-    p.append(re.compile(r'\bfor\s+(best [a-z0-9 ,&/\'\-]+)', re.I))
-    p.append(re.compile(r'\baward for\s+(best [a-z0-9 ,&/\'\-]+)', re.I))
-    p.append(re.compile(r'\b(best [a-z0-9 ,&/\'\-]+?)\s+(?:goes to|goes|is|was|win|winner|wins)\b', re.I))
-    p.append(re.compile(r'\b(best[ A-Za-z0-9,&/\-]+?)\s*(?:–|—|-)\s*[A-Za-z]+', re.I))
-    return p
+# One scanner finds every "best" (with its optional "for"/"award for" lead-in);
+# the span rules are then only tried anchored at those offsets.
+_BEST_SCAN = re.compile(r'(?:\b(award )?for\s+)?best')
+_SPAN_PLAIN = re.compile(r'best [a-z0-9 ,&/\'\-]+', re.I)
+_SPAN_CUE = re.compile(r'(best [a-z0-9 ,&/\'\-]+?)\s+(?:goes to|goes|is|was|win|winner|wins)\b', re.I)
+_SPAN_DASH = re.compile(r'(best[ A-Za-z0-9,&/\-]+?)\s*(?:–|—|-)\s*[A-Za-z]+', re.I)
+_SPAN_WIDE = re.compile(r'best[ A-Za-z0-9/&\-]{3,}', re.I)
+_HASHTAG = re.compile(r'#([A-Za-z][A-Za-z0-9]+)')
+_THE_AWARD = re.compile(r"\bthe\s+([a-z0-9 ,'\-]{8,30})\s+award\b")
+
+def _word_start(t, i):
+    return i == 0 or not (t[i - 1].isalnum() or t[i - 1] == '_')
 
 def _harvest_award_spans(t):
-    out = []
-    for rx in _patterns():
-        for m in rx.finditer(t):
-            g = m.group(1)
-            if g:
-                out.append(g)
-    for m in re.finditer(r'(best[ A-Za-z0-9/&\-]{3,})', t, re.I):
-        seg = _slice_window(t, m.start(), 90)
-        out.append(seg)
-    return out
+    # Every rule keeps its own non-overlap cursor and its own bucket, so the
+    # output is the same as running each rule as a separate finditer pass.
+    plain, after_for, after_award, cue, dash, wide = [], [], [], [], [], []
+    ends = [0] * 6
+    for m in _BEST_SCAN.finditer(t):
+        b = m.end() - 4
+        at_word = _word_start(t, b)
+        body = _SPAN_PLAIN.match(t, b) if at_word else None
+        if body:
+            if b >= ends[0]:
+                plain.append(body.group(0))
+                ends[0] = body.end()
+            lead = m.start() + (6 if m.group(1) else 0)
+            if lead < b and lead >= ends[1]:
+                after_for.append(body.group(0))
+                ends[1] = body.end()
+            if m.group(1) and m.start() >= ends[2]:
+                after_award.append(body.group(0))
+                ends[2] = body.end()
+        if at_word and b >= ends[3]:
+            c = _SPAN_CUE.match(t, b)
+            if c:
+                cue.append(c.group(1))
+                ends[3] = c.end()
+        if at_word and b >= ends[4]:
+            d = _SPAN_DASH.match(t, b)
+            if d:
+                dash.append(d.group(1))
+                ends[4] = d.end()
+        if b >= ends[5]:
+            w = _SPAN_WIDE.match(t, b)
+            if w:
+                wide.append(_slice_window(t, b, 90))
+                ends[5] = w.end()
+    return plain + after_for + after_award + cue + dash + wide
 
 def _hashtags_to_awards(t):
+    # segmented once per distinct tag, so #bestactress reads like #BestActress
     out = []
-    for tag in re.findall(r'#([A-Za-z][A-Za-z0-9]+)', t):
-        s = _split_camel_hashtag(tag)
-        if s:
+    for tag in _HASHTAG.findall(t):
+        s = hashtags.phrase(tag)
+        if s.startswith('best '):
             out.append(s)
     return out
 
+def _harvest(raw):
+    """One pass over a tweet: award spans, hashtag awards and the "the ... award" extra."""
+    low = remove_symbols(raw).lower()
+    found = []
+    if 'best' in low or '#best' in raw:
+        found = _harvest_award_spans(low) + _hashtags_to_awards(raw)
+    extra = None
+    if 'award' in low:
+        m = _THE_AWARD.search(low)
+        if m:
+            extra = 'cecil b. demille award' if 'demille' in m.group(1) else m.group(1) + ' award'
+    return found, extra
+
 def _merge(items, k=200):
-    cnt = Counter(items).most_common(k)
+    v, counts = vocab.tally(items)
+    top = vocab.top_k(counts, k)
+    return _merge_counts(zip(v.decode(top), counts[top].tolist()))
+
+def _merge_counts(cnt):
+    """Fuzzy-merge (span, count) pairs, most frequent first."""
     res = []
+    compared = 0
     for s, c in cnt:
         put = True
         for j in res:
             a, n = j
+            compared += 1
             if fuzz.token_sort_ratio(a, s) > 88 and fuzz.partial_ratio(a, s) > 88:
                 if len(s) < len(a):
                     j[0] = s
@@ -103,65 +201,62 @@ def _merge(items, k=200):
                 res.sort(key=lambda x: x[1])
                 res[0] = [s, 1]
     res.sort(key=lambda x: x[1], reverse=True)
+    tracing.count('fuzzy.comparisons', compared)
     return res
 
+@lru_cache(maxsize=_NORM_MEMO_SIZE)
 def _post_rules(s):
-    s = _norm(_canon_award(s))
-    s = s.replace(' best best ', ' best ')
-    s = s.replace(' best the ', ' best ')
-    s = re.sub(r'\bperformance in a\b', ' performance by an ', s)
-    s = re.sub(r'\bperformance in\b', ' performance by an ', s)
-    s = s.replace(' actor actress ', ' actor ',)
-    s = s.replace(' actress actor ', ' actress ',)
-    s = s.replace(' best tv ', ' best television ')
-    s = s.replace(' comedy musical', ' comedy or musical')
-    s = s.replace(' musical comedy', ' comedy or musical')
-    s = s.replace(' best original soundtrack ', ' best original score ')
-    s = s.replace(' screenplay motion picture', ' screenplay - motion picture')
-    s = s.replace(' director motion picture', ' director - motion picture')
-    s = s.replace(' original song motion picture', ' original song - motion picture')
-    s = s.replace(' original score motion picture', ' original score - motion picture')
-    s = s.replace(' best animated feature ', ' best animated feature film ')
-    s = s.replace(' best foreign film ', ' best foreign language film ')
-    s = re.sub(r'\s+', ' ', s).strip()
-    return s
+    s = _POST(_norm(_canon_award(s)))
+    return _SPACES.sub(' ', s).strip()
+
+_INVALID = re.compile(r'[!@#%&]|http')
 
 def _valid(s):
     if len(s) < 12:
         return False
     if not s.startswith('best ') and not s.endswith(' demille award'):
         return False
-    if re.search(r'[!@#%&]|http', s):
+    if _INVALID.search(s):
         return False
     return True
 
 def run_awards(year):
-    with open('gg'+str(year)+'.json', encoding='utf-8') as f:
-        data = json.load(f)
+    with tracing.span('awards', year=str(year)):
+        return _run_awards(year)
+
+def _run_awards(year):
+    full = tweet_store.load(year)
+    hashtags.build(full)
+    store = prefilter.select(full, prefilter.AWARDS)
+    memo = _post_rules.cache_info()
 
+    with tracing.span('filter', items_in=len(store)):
+        harvested = store.map_texts(_harvest)
+    # with sketches on, the span pool is a bounded heavy-hitter counter
+    hh = sketches.HeavyHitters(max(sketches.CAPACITY, 300)) if sketches.enabled() else None
     pool = []
-    for it in data:
-        raw = it.get('text', '')
-        tw = remove_symbols(raw)
-        low = tw.lower()
-        if 'best' in low or '#best' in raw:
-            spans = _harvest_award_spans(low)
-            tags = _hashtags_to_awards(raw)
-            for s in spans + tags:
+    add = pool.append if hh is None else hh.add
+    extras = []
+    with tracing.span('normalize') as sp:
+        for found, extra in harvested:
+            for s in found:
                 s = _post_rules(s)
                 if _valid(s):
-                    pool.append(s)
-
-    merged = _merge(pool, k=300)
+                    add(s)
+            if extra:
+                s = _post_rules(extra)
+                if _valid(s):
+                    extras.append(s)
+        sp.set(items_out=len(pool if hh is None else hh) + len(extras))
+        if hh is not None:
+            sp.set(sketch_error=hh.error_bound())
+    now = _post_rules.cache_info()
+    tracing.count('award_norm.hit', now.hits - memo.hits)
+    tracing.count('award_norm.miss', now.misses - memo.misses)
 
-    extras = []
-    for it in data:
-        t = remove_symbols(it.get('text','').lower())
-        m = re.search(r'\bthe\s+([a-z0-9 ,\'\-]{8,30})\s+award\b', t)
-        if m:
-            s = _post_rules('cecil b. demille award' if 'demille' in m.group(1) else m.group(1) + ' award')
-            if _valid(s):
-                extras.append(s)
+    with tracing.span('merge', items_in=len(pool if hh is None else hh)) as sp:
+        merged = _merge(pool, k=300) if hh is None else _merge_counts(hh.most_common(300))
+        sp.set(items_out=len(merged))
 
     out = []
     seen = set()
@@ -198,6 +293,8 @@ def run_awards(year):
     return final
 
 if __name__ == '__main__':
-    res = run_awards(2013)
+    import sys
+    args = memprof.cli(sys.argv[1:])
+    res = run_awards(args[0] if args else 2013)
     for x in res[:60]:
         print(x)
@@ -0,0 +1,111 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import run
+
+# Regression gate: runs the autograder in a fresh process with the result cache
+# off, measures wall time and peak RSS alongside its spelling/completeness
+# scores, and compares against a stored baseline. Exits non-zero when runtime
+# or memory grow past the allowed fraction, or any score drops, so a speedup in
+# one module can be checked against accuracy loss in the same run.
+
+BASELINE = os.path.join(run.ROOT, "benchmarks", "baseline.json")
+PARTS = ["hosts", "awards", "nominees", "presenters", "winner"]
+_MARK = "@@GATE@@"
+
+
+def _workdir(args):
+    """Project root for the real corpus, or a scratch dir holding a synthetic one plus the answer key."""
+    if not args.synthetic:
+        return run.ROOT
+    d = run.corpus(args.workdir, args.synthetic, args.seed)
+    key = os.path.join(d, f"gg{run.YEAR}answers.json")
+    if not os.path.exists(key):
+        os.symlink(os.path.join(run.ROOT, f"gg{run.YEAR}answers.json"), key)
+    return d
+
+
+def measure(args):
+    code = (
+        "import json, autograder\n"
+        f"s = autograder.main({args.parts!r})\n"
+        f"print({_MARK!r} + json.dumps(s))"
+    )
+    cwd = _workdir(args)
+    best, rss = None, None
+    for _ in range(args.repeat):
+        # set iteration order feeds tie-breaks in the pipeline; pin it so scores are comparable
+        row, out = run.run_code(code, cwd, args.timeout, {"PYTHONHASHSEED": "0"})
+        if row["returncode"] != 0:
+            sys.exit(f"autograder failed: {row['error']}")
+        line = next(l for l in reversed(out.splitlines()) if l.startswith(_MARK))
+        row["scores"] = json.loads(line[len(_MARK):])
+        # fastest wall time and lowest peak RSS are kept independently; they need not come from one repeat
+        if best is None or row["wall_s"] < best["wall_s"]:
+            best = row
+        rss = row["peak_rss_mb"] if rss is None else min(rss, row["peak_rss_mb"])
+    best.update(peak_rss_mb=rss, parts=args.parts, synthetic=args.synthetic, seed=args.seed,
+                created=time.strftime("%Y-%m-%dT%H:%M:%S"))
+    return best
+
+
+def compare(cur, base, args):
+    """List of failure messages; empty when cur is within budget of base."""
+    fails = []
+    if cur["wall_s"] > base["wall_s"] * (1 + args.max_slowdown):
+        fails.append(f"wall time {base['wall_s']:.2f}s -> {cur['wall_s']:.2f}s (> +{args.max_slowdown:.0%})")
+    if cur["peak_rss_mb"] > base["peak_rss_mb"] * (1 + args.max_memory):
+        fails.append(f"peak RSS {base['peak_rss_mb']:.0f} MB -> {cur['peak_rss_mb']:.0f} MB (> +{args.max_memory:.0%})")
+    for year, parts in base["scores"].items():
+        for part, metrics in parts.items():
+            for metric, was in metrics.items():
+                now = cur["scores"].get(year, {}).get(part, {}).get(metric)
+                if now is None:
+                    fails.append(f"{year} {part} {metric} {was:.4f} -> missing")
+                elif now < was - args.max_accuracy_drop:
+                    fails.append(f"{year} {part} {metric} {was:.4f} -> {now:.4f}")
+    return fails
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fail when runtime, memory or autograder scores regress.")
+    parser.add_argument("--parts", nargs="+", default=PARTS, choices=PARTS)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="record this run as the new baseline")
+    parser.add_argument("--synthetic", type=int, default=0, metavar="N",
+                        help="grade on an N-tweet synthetic corpus instead of the real gg2013.json")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", default=os.path.join(run.ROOT, "benchmarks", ".work"))
+    parser.add_argument("--repeat", type=int, default=1, help="runs per measurement; the fastest time and lowest RSS are kept")
+    parser.add_argument("--timeout", type=float, default=None)
+    parser.add_argument("--max-slowdown", type=float, default=0.10)
+    parser.add_argument("--max-memory", type=float, default=0.10)
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    cur = measure(args)
+    print(f"wall {cur['wall_s']:.2f}s, peak RSS {cur['peak_rss_mb']:.0f} MB")
+
+    if args.update_baseline or not os.path.exists(args.baseline):
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(cur, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        base = json.load(f)
+    if (base.get("parts"), base.get("synthetic"), base.get("seed")) != (cur["parts"], cur["synthetic"], cur["seed"]):
+        sys.exit("baseline was recorded with different --parts/--synthetic/--seed; rerun with --update-baseline")
+    fails = compare(cur, base, args)
+    for msg in fails:
+        print("REGRESSION:", msg)
+    if not fails:
+        print(f"OK (baseline {base['wall_s']:.2f}s, {base['peak_rss_mb']:.0f} MB)")
+    return 1 if fails else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import synth
+
+# Scaling benchmark: generates synthetic corpora, runs every module (and the
+# full gg_api pipeline) in a fresh subprocess per corpus size, and records
+# wall time, throughput and peak RSS to a JSON report.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+YEAR = "2013"
+SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+
+TARGETS = {
+    "hosts": "import hosts; hosts.run_hosts(Y)",
+    "awards": "import awards; awards.run_awards(Y)",
+    "winners": "import winners; winners.run_winners(Y)",
+    "nominees": "import nominees; nominees.run_nominees(Y)",
+    "presenters": "import presenters; presenters.run_presenters(Y)",
+    "parties": "import parties; parties.run_parties(Y)",
+    "redcarpet": "import redcarpet; redcarpet.run_redcarpet(Y)",
+    "pipeline": (
+        "import gg_api\n"
+        "for part in ('hosts', 'awards', 'nominees', 'presenters', 'winner'):\n"
+        "    getattr(gg_api, 'get_' + part)(Y)"
+    ),
+}
+
+
+def _peak_rss_mb(ru):
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return ru.ru_maxrss / (1024.0 * 1024.0) if sys.platform == "darwin" else ru.ru_maxrss / 1024.0
+
+
+def corpus(workdir, n, seed):
+    """Directory holding gg2013.json with n synthetic tweets; generated once per (n, seed)."""
+    d = os.path.join(workdir, f"n{n}-s{seed}")
+    path = os.path.join(d, f"gg{YEAR}.json")
+    if not os.path.exists(path):
+        os.makedirs(d, exist_ok=True)
+        t = time.perf_counter()
+        synth.generate(path + ".tmp", n, seed=seed)
+        os.replace(path + ".tmp", path)
+        print(f"  generated {n} tweets in {time.perf_counter() - t:.1f}s")
+    return d
+
+
+def run_code(code, cwd, timeout=None, extra_env=None):
+    """Run python code in a fresh interpreter; returns (wall/rss row, captured stdout)."""
+    code = f"import sys; sys.path.insert(0, {ROOT!r}); Y = {YEAR!r}\n" + code
+    env = dict(os.environ, GG_NO_CACHE="1", **(extra_env or {}))
+    with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+        t = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, "-c", code], cwd=cwd, env=env, stdout=out, stderr=err)
+        deadline = None if timeout is None else t + timeout
+        while True:
+            pid, status, ru = os.wait4(proc.pid, os.WNOHANG)
+            if pid:
+                break
+            if deadline is not None and time.perf_counter() > deadline:
+                proc.kill()
+                pid, status, ru = os.wait4(proc.pid, 0)
+                break
+            time.sleep(0.05)
+        wall = time.perf_counter() - t
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        out.seek(0)
+        err.seek(0)
+        stdout = out.read().decode("utf-8", "replace")
+        stderr = err.read().decode("utf-8", "replace")
+    row = {
+        "wall_s": round(wall, 3),
+        "peak_rss_mb": round(_peak_rss_mb(ru), 1),
+        "returncode": proc.returncode,
+        "error": (stderr.strip().splitlines() or ["killed"])[-1] if proc.returncode else None,
+    }
+    return row, stdout
+
+
+def run_target(name, cwd, timeout=None, extra_env=None):
+    return run_code(TARGETS[name], cwd, timeout, extra_env)[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark gg_api modules on synthetic corpora.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--targets", nargs="+", default=list(TARGETS), choices=list(TARGETS))
+    parser.add_argument("--workdir", default=os.path.join(ROOT, "benchmarks", ".work"))
+    parser.add_argument("--out", default=os.path.join(ROOT, "benchmarks", "report.json"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=None, help="seconds per run before it is killed")
+    args = parser.parse_args(argv)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "runs": [],
+    }
+    for n in args.sizes:
+        print(f"== {n} tweets")
+        cwd = corpus(args.workdir, n, args.seed)
+        for name in args.targets:
+            row = {"size": n, "target": name}
+            row.update(run_target(name, cwd, args.timeout))
+            row["tweets_per_s"] = round(n / row["wall_s"], 1) if row["wall_s"] else None
+            report["runs"].append(row)
+            status = "ok" if row["returncode"] == 0 else f"FAILED ({row['error']})"
+            print(f"  {name:<11} {row['wall_s']:>9.2f}s {row['peak_rss_mb']:>9.1f} MB  {status}")
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+    print(f"Wrote {args.out}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
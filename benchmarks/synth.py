@@ -0,0 +1,103 @@
+import json
+import os
+import random
+import sys
+
+# Synthetic Golden Globes-like tweet streams for the benchmarks. Names and
+# categories come from the answer key so every module has something to find.
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_FILLER = [
+    "omg", "love", "this", "so", "good", "tonight", "watching", "the", "show", "lol", "wow",
+    "can't", "believe", "what", "a", "night", "amazing", "speech", "dress", "haha", "yes",
+    "finally", "really", "great", "boring", "funny", "crying", "everyone", "best", "ever",
+]
+_HASHTAGS = ["#GoldenGlobes", "#GoldenGlobes2013", "#redcarpet", "#BestActor", "#bestactress", "#NetflixAfterParty", "#Globes"]
+_PARTIES = ["netflix after party", "hbo party", "weinstein after party", "instyle party", "fox party"]
+_FOREIGN = ["que bonito vestido esta noche", "je suis fan de ce film", "das war eine tolle rede", "che bella serata"]
+
+
+def _title(s):
+    return " ".join(w.capitalize() for w in s.split())
+
+
+def _load_key(path=None):
+    path = path or os.path.join(_ROOT, "gg2013answers.json")
+    with open(path, encoding="utf-8") as f:
+        key = json.load(f)
+    awards = []
+    for name, d in key["award_data"].items():
+        awards.append((name, d["winner"], d["nominees"], d["presenters"]))
+    return key["hosts"], awards
+
+
+def _tweet(rng, hosts, awards):
+    r = rng.random()
+    name, winner, nominees, presenters = rng.choice(awards)
+    short = name.replace("performance by an ", "").replace(" in a ", " in ")
+    if r < 0.08:
+        h = [_title(x) for x in hosts]
+        return rng.choice([f"{h[0]} and {h[1]} are hosting the Golden Globes tonight",
+                           f"{h[0]} is the best host ever",
+                           f"Loving {h[1]} as host"])
+    if r < 0.30:
+        w = _title(winner)
+        return rng.choice([f"{w} wins {short}", f"{short} goes to {w}!",
+                           f"Congrats to {w} for winning {short}", f"And the award for {short} goes to {w}"])
+    if r < 0.42 and nominees:
+        n = _title(rng.choice(nominees))
+        return rng.choice([f"{n} was nominated for {short}", f"{n} should have won {short}",
+                           f"I was rooting for {n} for {short}"])
+    if r < 0.52 and presenters:
+        p = [_title(x) for x in presenters]
+        return rng.choice([f"{' and '.join(p)} presenting {short}",
+                           f"{p[0]} presents the award for {short}", f"{p[0]} announced {short}"])
+    if r < 0.58:
+        person = _title(rng.choice([w for _, w, _, _ in awards]))
+        return rng.choice([f"{person} best dressed tonight", f"{person} worst dressed of the night",
+                           f"{person} looks stunning on the red carpet"])
+    if r < 0.63:
+        return rng.choice([f"Heading to the {rng.choice(_PARTIES)} tonight!", f"The {rng.choice(_PARTIES)} was amazing",
+                           f"{rng.choice(_PARTIES)} is so boring"])
+    if r < 0.66:
+        return rng.choice(_FOREIGN)
+    return " ".join(rng.choice(_FILLER) for _ in range(rng.randint(4, 14)))
+
+
+def generate(path, n, seed=0, retweet_rate=0.35, hashtag_rate=0.3, start_ms=1358124000000):
+    """Write n tweets as a JSON array to path, streaming so 10M tweets fit in memory."""
+    rng = random.Random(seed)
+    hosts, awards = _load_key()
+    recent = []
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for i in range(n):
+            if recent and rng.random() < retweet_rate:
+                text = "RT @" + rng.choice(recent)
+            else:
+                text = _tweet(rng, hosts, awards)
+                if rng.random() < hashtag_rate:
+                    text += " " + rng.choice(_HASHTAGS)
+                user = f"user{rng.randint(1, max(10, n // 5))}"
+                recent.append(f"{user}: {text}")
+                if len(recent) > 200:
+                    recent.pop(0)
+            rec = {
+                "text": text,
+                "user": {"screen_name": f"user{rng.randint(1, max(10, n // 5))}", "id": rng.randint(1, 10 ** 9)},
+                "id": 290000000000000000 + i,
+                "timestamp_ms": start_ms + i * max(1, 3 * 3600 * 1000 // max(1, n)),
+            }
+            if i:
+                f.write(",\n")
+            f.write(json.dumps(rec, ensure_ascii=False))
+        f.write("]\n")
+    return path
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    out = sys.argv[2] if len(sys.argv) > 2 else "gg2013.json"
+    generate(out, n)
+    print(f"Wrote {n} tweets to {out}")
@@ -0,0 +1,187 @@
+import re
+
+import numpy as np
+import spacy
+
+import langfilter
+import tagging
+import tracing
+import tweet_store
+import vocab
+from award_plans import AWARD_NAMES, build_plans, stopwords
+
+# One-pass category x entity co-occurrence (opt-in: gg_api.py --cooccur or
+# GG_COOCCUR=1). Each distinct tweet is cleaned and routed to the award rows
+# it mentions (the nominee-pattern tokens first, then the ordered pattern) and
+# to the presenter rows whose keywords it contains. Routed texts are tagged in
+# one batch, and every (row, entity) pair is recorded with the tweet's cue
+# flags (win / nominee / present) and its retweet multiplicity. Winners,
+# nominees and presenters are then top-k queries over a row under different
+# cue weights, so the work no longer scales with categories x tweets.
+
+_URL = re.compile(r'https?://\S+|www\.\S+')
+_CUES = [
+    re.compile(r"\b(?:wins?|won|winner|goes to|takes home|accept\w*|congrat\w*)\b", re.I),
+    re.compile(r"\b(?:nominat\w*|nominee\w*|up for|should(?:'ve| have) won|robbed|snub\w*)\b", re.I),
+    re.compile(r"\b(?:present\w*|introduc\w*|announc\w*|on stage)\b", re.I),
+]
+_WIN, _NOM, _PRESENT = 1, 2, 4
+
+# weight of a tweet for each query, by cue; a tweet with several cues takes the largest
+_WEIGHTS = {
+    'winner': {0: 1.0, _WIN: 3.0, _NOM: 0.5, _PRESENT: 0.5},
+    'nominee': {0: 1.0, _WIN: 1.0, _NOM: 3.0, _PRESENT: 0.5},
+    'presenter': {0: 0.0, _WIN: 0.0, _NOM: 0.0, _PRESENT: 1.0},
+}
+
+_GENERIC = {'golden', 'globe', 'globes', 'best', 'award', 'awards', 'motion', 'picture', 'television',
+            'series', 'tv', 'mini', 'rt', 'congrats', 'congratulations', 'winner', 'nominee'}
+
+_MATRICES = {}     # (year, award names) -> (store, Cooccurrence)
+
+
+def _clean(t):
+    words = [w for w in _URL.sub(' ', t).replace('&amp;', '&').split()
+             if w.lower() != 'rt' and w[:1] not in ('@', '#')]
+    return ' '.join(words)
+
+
+def _cue_flags(t):
+    return sum(bit for bit, rx in zip((_WIN, _NOM, _PRESENT), _CUES) if rx.search(t))
+
+
+def _blocked(plan):
+    """Words that disqualify an entity for this award: its own name tokens and generic show words."""
+    return frozenset(plan.nom_tokens) | _GENERIC
+
+
+def _weight_table(query):
+    w = _WEIGHTS[query]
+    return np.array([max([w[b] for b in (_WIN, _NOM, _PRESENT) if m & b] or [w[0]]) for m in range(8)])
+
+
+class Cooccurrence:
+    """Row-sorted sparse (row, entity) entries; rows are the awards, then one presenter row per award."""
+
+    def __init__(self, names, entities, rows, cols, cues, mult):
+        order = np.argsort(rows, kind='stable')
+        self.names = list(names)
+        self.row_of = {n: i for i, n in enumerate(self.names)}
+        self.entities = entities
+        self.cols = cols[order]
+        self.cues = cues[order]
+        self.mult = mult[order]
+        self.row_ptr = np.searchsorted(rows[order], np.arange(2 * len(self.names) + 1))
+
+    def top(self, award, query, k, blocked=frozenset(), presenter_row=False, skip=()):
+        """k best entities of a row; drops blocked/stopword-only names and fragments of ones already taken."""
+        r = self.row_of[award] + (len(self.names) if presenter_row else 0)
+        lo, hi = self.row_ptr[r], self.row_ptr[r + 1]
+        scores = np.bincount(self.cols[lo:hi], weights=self.mult[lo:hi] * _weight_table(query)[self.cues[lo:hi]],
+                             minlength=len(self.entities))
+        sw = stopwords()
+        taken = [set(s.split()) for s in skip if s]
+        out = []
+        for i in vocab.top_k(scores):
+            name = self.entities.strings[i]
+            words = set(name.split())
+            if words & blocked or words <= sw or any(words <= t for t in taken):
+                continue
+            out.append(name)
+            taken.append(words)
+            if len(out) == k:
+                break
+        return out
+
+
+def build(year, nlp=None, names=AWARD_NAMES):
+    store = langfilter.select(tweet_store.load(year))
+    # keyed by year and checked by store identity: a reloaded or filtered store rebuilds
+    key = (str(year), tuple(names))
+    hit = _MATRICES.get(key)
+    if hit is not None and hit[0] is store:
+        return hit[1]
+    with tracing.span('cooccur', year=str(year)):
+        plans = build_plans(names)
+        toks = sorted({t for p in plans for t in p.nom_tokens + p.presenter_keywords})
+        need = [(frozenset(p.nom_tokens), frozenset(p.presenter_keywords)) for p in plans]
+        mult = np.bincount(store.text_ids, minlength=store.n_unique)
+
+        routed = []   # (unique id, cleaned text, award rows, presenter rows)
+        with tracing.span('route', items_in=store.n_unique) as sp:
+            for j, t in enumerate(store.unique_results(_clean)):
+                low = t.lower()
+                present = {tok for tok in toks if tok in low}
+                if not present:
+                    continue
+                award_rows = [i for i, (p, (nt, _)) in enumerate(zip(plans, need))
+                              if nt <= present and (p.mentions_act or 'act' not in low)
+                              and p.nom_pattern is not None and p.nom_pattern.search(t)]
+                pres_rows = [i for i, (_, pk) in enumerate(need) if pk and pk <= present]
+                if award_rows or pres_rows:
+                    routed.append((j, t, award_rows, pres_rows))
+            sp.set(items_out=len(routed))
+
+        nlp = nlp or spacy.load('en_core_web_sm')
+        anns = tagging.annotate([t for _, t, _, _ in routed], nlp)
+
+        entities = vocab.Vocabulary()
+        rows, cols, cues, weights = [], [], [], []
+        n = len(plans)
+
+        def add(row, ents, flags, w):
+            ids = [entities.id(e) for e in ents]
+            rows.extend([row] * len(ids))
+            cols.extend(ids)
+            cues.extend([flags] * len(ids))
+            weights.extend([w] * len(ids))
+
+        with tracing.span('count', items_in=len(routed)) as sp:
+            for (j, t, award_rows, pres_rows), a in zip(routed, anns):
+                people = {s.lower() for s in a.persons} | {s.lower() for s in a.names if len(s.split()) >= 2}
+                titles = {s.lower() for s in a.titles} | {s.lower() for s in a.names}
+                flags, w = _cue_flags(t), float(mult[j])
+                for i in award_rows:
+                    add(i, people if plans[i].is_person else titles, flags, w)
+                for i in pres_rows:
+                    add(n + i, people, flags, w)
+            sp.set(items_out=len(rows))
+
+        m = Cooccurrence(names, entities, np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64),
+                         np.array(cues, dtype=np.int8), np.array(weights, dtype=np.float64))
+    _MATRICES.clear()
+    _MATRICES[key] = (store, m)
+    return m
+
+
+def winners(year, names=AWARD_NAMES):
+    m = build(year, names=names)
+    plans = build_plans(names)
+    out = {}
+    for p in plans:
+        top = m.top(p.name, 'winner', 1, blocked=_blocked(p))
+        out[p.name] = top[0] if top else ''
+    return out
+
+
+def nominees(year, names=AWARD_NAMES, k=4):
+    m = build(year, names=names)
+    won = winners(year, names)
+    out = {}
+    for p in build_plans(names):
+        noms = m.top(p.name, 'nominee', k, blocked=_blocked(p), skip={won[p.name]})
+        # padded like nominees.run_nominees, so both modes return k entries per award
+        while len(noms) < k:
+            noms.append('l')
+        out[p.name] = noms
+    return out
+
+
+def presenters(year, names=AWARD_NAMES, k=2):
+    m = build(year, names=names)
+    won = winners(year, names)
+    out = {}
+    for p in build_plans(names):
+        top = m.top(p.name, 'presenter', k, blocked=_blocked(p), presenter_row=True, skip={won[p.name]})
+        out[p.name] = ', '.join(top) if top else 'NA'
+    return out
@@ -0,0 +1,45 @@
+import io
+import os
+import re
+
+# Where a year's tweets live and how to read them. gg{year}.json may also be
+# stored compressed (.gz, .bz2, .xz, .zst); the first of those that exists is
+# used and decompressed as a stream, so an archive is never expanded on disk
+# and only the compressed bytes are read. .zst needs the zstandard package.
+
+EXTS = ('', '.gz', '.bz2', '.xz', '.zst')
+_NAME = re.compile(r'gg(\d{4})\.json(?:\.gz|\.bz2|\.xz|\.zst)?')
+
+
+def path(year, root=''):
+    """Path of the tweet file for year; the plain name if no variant exists."""
+    base = os.path.join(root, f'gg{year}.json')
+    for ext in EXTS:
+        if os.path.exists(base + ext):
+            return base + ext
+    return base
+
+
+def years(root=''):
+    return sorted({m.group(1) for m in map(_NAME.fullmatch, os.listdir(root or '.')) if m})
+
+
+def open_text(p):
+    """Text stream over a (possibly compressed) tweet file."""
+    if p.endswith('.gz'):
+        import gzip
+        return gzip.open(p, 'rt', encoding='utf-8')
+    if p.endswith('.bz2'):
+        import bz2
+        return bz2.open(p, 'rt', encoding='utf-8')
+    if p.endswith('.xz'):
+        import lzma
+        return lzma.open(p, 'rt', encoding='utf-8')
+    if p.endswith('.zst'):
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError(f'reading {p} needs the zstandard package (pip install zstandard)') from None
+        reader = zstandard.ZstdDecompressor().stream_reader(open(p, 'rb'), read_across_frames=True, closefd=True)
+        return io.TextIOWrapper(reader, encoding='utf-8')
+    return open(p, 'r', encoding='utf-8')
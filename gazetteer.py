@@ -0,0 +1,152 @@
+import os
+import random
+import re
+from collections import Counter
+
+from spacy.matcher import PhraseMatcher
+from spacy.tokens import Span
+from spacy.util import filter_spans
+
+import tagging
+import tracing
+
+# Two-pass name finding for winners, nominees and presenters. Pass one runs
+# the real spaCy pipeline on a seeded sample of the distinct texts a module is
+# about to tag (an equal share per category) and collects what it found:
+# PERSON and title entities, PROPN runs, and which capitalized words the
+# tagger did not take for proper nouns. Those phrases are compiled into a
+# case-insensitive PhraseMatcher, and pass two "annotates" every other text
+# with the tokenizer and the matcher alone, reporting each phrase in the form
+# NER first produced it. Names NER never saw in the sample cannot be found, so
+# counts are close to but not exactly the per-tweet NER ones; the frequent
+# names a category is decided by are the ones a sample catches. Off by
+# default; enable with GG_GAZETTEER=1 (or GG_GAZETTEER=<sample size>) or
+# gg_api.py --gazetteer [sample size].
+
+SAMPLE = 2000
+SEED = 0
+_NESTED = {'N'}     # fields whose matches may overlap (the PROPN matcher's are nested too)
+_WORD = re.compile(r"[A-Za-z]+(?:'[A-Za-z]+)?$")
+
+
+def _from_env():
+    v = os.environ.get('GG_GAZETTEER', '')
+    if not v:
+        return None
+    return SAMPLE if v == '1' else int(v)
+
+
+SIZE = _from_env()
+ENABLED = SIZE is not None
+
+
+def enable(size=None):
+    global ENABLED, SIZE
+    ENABLED = True
+    SIZE = int(size) if size else (SIZE or SAMPLE)
+
+
+def sample(groups, key):
+    """Up to SIZE distinct texts, an equal share from each group (e.g. category), drawn with a seed per key."""
+    groups = [list(dict.fromkeys(g)) for g in groups]
+    share = max(1, (SIZE or SAMPLE) // max(1, len(groups)))
+    out = {}
+    for i, g in enumerate(groups):
+        if len(g) > share:
+            random.Random(f'{SEED}:{key}:{i}').shuffle(g)
+        out.update(dict.fromkeys(g[:share]))
+    return list(out)
+
+
+class Gazetteer:
+    """Phrases learned from NER output, found again in new text by a case-insensitive PhraseMatcher."""
+
+    def __init__(self, nlp):
+        self.nlp = nlp
+        self.matcher = PhraseMatcher(nlp.vocab, attr='LOWER')
+        self.canon = {}     # 'field\tlowercased phrase' -> surface form reported for it
+        self.common = set()     # lowercased words the tagger mostly did not call proper nouns when capitalized
+        self._annotations = {}
+        self._names = {}
+
+    def __len__(self):
+        return len(self.canon)
+
+    def add(self, field, phrases):
+        new = {}
+        for p in phrases:
+            key = f'{field}\t{p.lower()}'
+            if key not in self.canon:
+                new.setdefault(key, p)
+        for (key, p), doc in zip(new.items(), self.nlp.tokenizer.pipe(new.values())):
+            self.canon[key] = p
+            self.matcher.add(key, [doc])
+
+    def find(self, text):
+        """(doc, {field: phrases}) with phrases in text order; the longest match wins where a field's overlap."""
+        doc = self.nlp.make_doc(text)
+        strings = self.nlp.vocab.strings
+        spans = {}
+        for mid, s, e in self.matcher(doc):
+            key = strings[mid]
+            spans.setdefault(key.split('\t', 1)[0], []).append(Span(doc, s, e, label=key))
+        tracing.count('gazetteer.docs')
+        found = {}
+        for field, sps in spans.items():
+            if field not in _NESTED:
+                sps = filter_spans(sps)
+            found[field] = tuple(self.canon[sp.label_] for sp in sps)
+        return doc, found
+
+    def annotation(self, text):
+        """A tagging.Annotation for text, built from matches instead of the tagger."""
+        a = self._annotations.get(text)
+        if a is None:
+            doc, found = self.find(text)
+            propn = [t.lower_ for t in doc if t.text[:1].isupper() and _WORD.match(t.text) and t.lower_ not in self.common]
+            a = self._annotations[text] = tagging.make(propn, found.get('P', ()), found.get('T', ()), found.get('N', ()))
+        return a
+
+    def names(self, text):
+        """Full (two-word or longer) names in text, as presenters' get_person would give them."""
+        hit = self._names.get(text)
+        if hit is None:
+            _, found = self.find(text)
+            hit = self._names[text] = [n for n in dict.fromkeys(found.get('P', ())) if len(n.split()) >= 2]
+        return hit
+
+
+def for_tagging(groups, nlp):
+    """Learn from NER on a sample of the texts in groups (one per category).
+
+    Use it with tagging.guessing(gz.annotation) to annotate every text spaCy has not parsed."""
+    with tracing.span('gazetteer', module='tagging', items_in=sum(map(len, groups))) as sp:
+        gz = Gazetteer(nlp)
+        fields = {'P': set(), 'T': set(), 'N': set()}
+        nnp, capital = Counter(), Counter()
+        texts = sample(groups, 'tagging')
+        for t, a in zip(texts, tagging.annotate(texts, nlp)):
+            fields['P'].update(a.persons)
+            fields['T'].update(a.titles)
+            fields['N'].update(a.names)
+            nnp.update(tagging.tokens(a.propn))
+            capital.update(tok.lower_ for tok in nlp.make_doc(t) if tok.text[:1].isupper())
+        for field, phrases in fields.items():
+            gz.add(field, sorted(phrases))
+        # capitalized words are proper nouns, except those the tagger mostly disagreed on in the sample
+        gz.common.update(w for w, c in capital.items() if 2 * nnp[w] < c)
+        sp.set(items_out=len(gz), sampled=len(texts))
+    return gz
+
+
+def for_presenters(groups, nlp, persons):
+    """Gazetteer of the names persons(text) (the real extraction) finds in a sample of the texts in groups."""
+    with tracing.span('gazetteer', module='presenters', items_in=sum(map(len, groups))) as sp:
+        gz = Gazetteer(nlp)
+        names = set()
+        texts = sample(groups, 'presenters')
+        for t in texts:
+            names.update(persons(t))
+        gz.add('P', sorted(names))
+        sp.set(items_out=len(gz), sampled=len(texts))
+    return gz
@@ -0,0 +1,127 @@
+import math
+import re
+from collections import Counter
+
+import numpy as np
+
+import tracing
+from award_plans import AWARD_NAMES, simple_tokens
+
+# Corpus-wide hashtag table shared by awards and parties. build(store) counts
+# every distinct tag once (weighted by how many tweets carry it) and segments
+# it once: CamelCase and hyphen boundaries split as before, an all-caps run
+# stays one word ('BestTVSeries' reads 'best tv series', where the old
+# splitters gave 'best t v series'), and every other run, lowercase or
+# capitalized, is then split by dynamic programming over a unigram model of
+# the corpus' own words (hashtags, mentions and links left out) plus the award
+# vocabulary, so '#bestactress' and '#Bestactress' read 'best actress' like
+# '#BestActress' does. A run stays whole unless every piece of its split is a
+# known word, so an unknown name is not cut after a short word at its front.
+# phrase(tag) answers from the table; tags it has not seen are segmented and
+# memoized.
+
+TAG = re.compile(r'#([A-Za-z][A-Za-z0-9\-]+)')
+MAX_WORD = 24
+
+_CAMEL = re.compile(r'[A-Z]+(?![a-z])|[A-Z][a-z]*|[a-z]+')
+_NOT_WORDS = re.compile(r'https?://\S+|www\.\S+|[#@]\w+')
+_WORDS = re.compile(r'[a-z]+')
+
+
+class Table:
+    __slots__ = ('counts', 'phrases', 'words', 'log_total')
+
+    def __init__(self, words):
+        self.counts = Counter()
+        self.phrases = {}
+        self.words = words
+        self.log_total = math.log(max(1, sum(words.values())))
+
+    def _cost(self, w):
+        c = self.words.get(w)
+        if c:
+            return self.log_total - math.log(c)
+        # unknown: dearer than any known word, and more so the longer it is
+        return self.log_total + len(w) * math.log(10.0)
+
+    def split(self, run):
+        """Cheapest split of a lowercase run into known words; the run itself if it has none."""
+        n = len(run)
+        best = [0.0] + [math.inf] * n
+        back = [0] * (n + 1)
+        for j in range(1, n + 1):
+            for i in range(max(0, j - MAX_WORD), j):
+                c = best[i] + self._cost(run[i:j])
+                if c < best[j]:
+                    best[j], back[j] = c, i
+        out = []
+        while n:
+            out.append(run[back[n]:n])
+            n = back[n]
+        # an unknown word must not lose a short known one off its front ('an nehathaway')
+        if len(out) > 1 and not all(w in self.words for w in out):
+            return [run]
+        return out[::-1]
+
+    def phrase(self, tag):
+        """Lowercase words of a tag, e.g. 'NetflixAfterParty' or 'netflixafterparty' -> 'netflix after party'."""
+        p = self.phrases.get(tag)
+        if p is None:
+            words = []
+            for part in _CAMEL.findall(tag):
+                # acronyms stay whole; a lowercase or capitalized run may still hide several words
+                if part.isupper():
+                    words.append(part.lower())
+                else:
+                    words.extend(self.split(part.lower()))
+            p = self.phrases[tag] = ' '.join(words)
+        return p
+
+
+def _vocabulary(texts):
+    words = Counter()
+    for t in texts:
+        words.update(_WORDS.findall(_NOT_WORDS.sub(' ', t).lower()))
+    for name in AWARD_NAMES:
+        words.update(simple_tokens(name))
+    return words
+
+
+_CURRENT = [None, None]     # store, Table
+
+
+def build(store):
+    """The hashtag table for `store`, built once and made current for phrase()."""
+    if _CURRENT[0] is not store:
+        with tracing.span('hashtags', items_in=store.n_unique) as sp:
+            texts = store.unique_texts
+            table = Table(_vocabulary(texts))
+            mult = np.bincount(store.text_ids, minlength=store.n_unique).tolist()
+            for j, t in enumerate(texts):
+                if '#' in t:
+                    for tag in TAG.findall(t):
+                        table.counts[tag] += mult[j]
+            for tag in table.counts:
+                table.phrase(tag)
+            sp.set(items_out=len(table.counts))
+        _CURRENT[:] = [store, table]
+    return _CURRENT[1]
+
+
+def phrase(tag):
+    table = _CURRENT[1]
+    if table is None:
+        table = _CURRENT[1] = Table(_vocabulary(()))
+    return table.phrase(tag)
+
+
+if __name__ == '__main__':
+    # regression check: camel case, all-caps, capitalized-lowercase and all-lowercase tags
+    t = Table(_vocabulary(['best actress in a tv series', 'netflix after party']))
+    for tag, want in [('BestActress', 'best actress'), ('BestTVSeries', 'best tv series'),
+                      ('HBOParty', 'hbo party'), ('GOLDENGLOBES', 'goldenglobes'),
+                      ('Bestactress', 'best actress'), ('Netflixafterparty', 'netflix after party'),
+                      ('bestactress', 'best actress'), ('annehathaway', 'annehathaway'),
+                      ('Annehathaway', 'annehathaway'), ('best-actress', 'best actress')]:
+        assert t.phrase(tag) == want, (tag, t.phrase(tag), want)
+    print('ok')
@@ -1,17 +1,16 @@
 import numpy as np
 import pandas as pd
-import nltk
-from nltk.tokenize import sent_tokenize, word_tokenize
-from nltk.corpus import stopwords
 import spacy
-import json
-import string
-import re
 from fuzzywuzzy import process
-from collections import Counter
 from spacy.matcher import Matcher
-from nltk.tokenize import sent_tokenize, word_tokenize
-from nltk.corpus import stopwords
+
+import langfilter
+import memprof
+import prefilter
+import sketches
+import tracing
+import tweet_store
+import vocab
 
 def remove_symbols(t):
     bad = {'@', '#'}
@@ -24,22 +23,30 @@ def remove_symbols(t):
     return ' '.join(out)
 
 def get_tweet_data(year):
-    p = f'gg{year}.json'
-    with open(p, 'r', encoding='utf-8') as f:
-        raw = json.load(f)
-
-    texts = [x['text'] for x in raw]
-    texts = [remove_symbols(x) for x in texts]
-    return pd.DataFrame(texts, columns=['text'])
+    store = langfilter.select(prefilter.select(tweet_store.load(year), prefilter.HOSTS))
+    with tracing.span('clean', items_in=len(store)):
+        texts = store.map_texts(remove_symbols)
+    with tracing.span('dataframe', items_in=len(texts)):
+        return pd.DataFrame(texts, columns=['text'])
 
 def get_person_names(texts, nlp):
-    counts = {}
-    for t in texts:
-        name = extract_full_name(nlp(t), nlp)
-        if name:
-            k = name.lower()
-            counts[k] = counts.get(k, 0) + 1
-    return counts
+    # with sketches on, at most CAPACITY names are kept (counts within error_bound())
+    hh = sketches.HeavyHitters() if sketches.enabled() else None
+    names = []
+    add = names.append if hh is None else hh.add
+    with tracing.span('nlp', items_in=len(texts)) as sp:
+        for t in texts:
+            name = extract_full_name(nlp(t), nlp)
+            if name:
+                add(name.lower())
+        tracing.count('nlp.docs', len(texts))
+        sp.set(items_out=len(names if hh is None else hh))
+        if hh is not None:
+            sp.set(sketch_error=hh.error_bound())
+    if hh is not None:
+        return hh.to_dict()
+    v, counts = vocab.tally(names)
+    return v.to_dict(counts)
 
 def extract_full_name(doc, nlp):
     m = Matcher(nlp.vocab)
@@ -59,15 +66,16 @@ def extract_full_name(doc, nlp):
 def get_top_percent(d, pct):
     if not d:
         return []
-    
-    mx = max(d.values())
-    th = mx * pct
-    return [k for k, v in d.items() if v > th]
+
+    keys = list(d)
+    vals = np.fromiter(d.values(), dtype=np.float64, count=len(keys))
+    return [keys[i] for i in vocab.above_fraction(vals, pct)]
 
 def remove_similar_names(names):
     res = sorted(names)
     for n in names:
         sims = process.extract(n, names)
+        tracing.count('fuzzy.comparisons', len(names))
         lead = sims[0][0]
 
         for cand, score in sims[1:]:
@@ -78,23 +86,34 @@ def remove_similar_names(names):
 
 def get_hosts(df, year):
     nlp = spacy.load("en_core_web_sm")
-    df = df.drop_duplicates(subset='text')
-    m = df['text'].str.contains("host", na=False)
-    host_df = df[m]
-    host_df = host_df[~host_df['text'].str.contains("next year", na=False)]
+    with tracing.span('filter', items_in=len(df)) as sp:
+        df = df.drop_duplicates(subset='text')
+        m = df['text'].str.contains("host", na=False)
+        host_df = df[m]
+        host_df = host_df[~host_df['text'].str.contains("next year", na=False)]
 
 
-    items = list(host_df['text'])
+        items = list(host_df['text'])
+        sp.set(items_out=len(items))
 
     people = get_person_names(items, nlp)
     people.pop('golden globes', None)
     people.pop('golden globe', None)
 
-    top = get_top_percent(people, pct=0.2)
-    clean = remove_similar_names(top)
+    with tracing.span('count', items_in=len(people)) as sp:
+        top = get_top_percent(people, pct=0.2)
+        sp.set(items_out=len(top))
+    with tracing.span('merge', items_in=len(top)) as sp:
+        clean = remove_similar_names(top)
+        sp.set(items_out=len(clean))
     return clean
 
 def run_hosts(year):
-    df = get_tweet_data(year)
-    return get_hosts(df, year)
-
+    with tracing.span('hosts', year=str(year)):
+        df = get_tweet_data(year)
+        return get_hosts(df, year)
+
+if __name__ == '__main__':
+    import sys
+    args = memprof.cli(sys.argv[1:])
+    print(run_hosts(args[0] if args else '2013'))
@@ -0,0 +1,163 @@
+import hashlib
+import os
+import pickle
+import re
+import tempfile
+
+import numpy as np
+
+import tracing
+
+# Optional language filter run after the prefilter and before the NLP stages
+# of hosts, winners, nominees, presenters, parties and redcarpet: tweets not
+# in LANGS are dropped from the store a module reads. Detection is langdetect
+# (offline, seeded so it is repeatable), run at most once per distinct text;
+# results are memoized and persisted to .gg_cache/lang.pkl keyed by a short
+# hash of the text (under a tag of the detection thresholds and word lists,
+# so changing those starts over), and later runs only look them up. Each
+# filtered store is kept per input store, so modules sharing one reuse it. Cheap
+# cases skip the detector: texts with too few letters to judge are kept, and
+# texts using two or more English function words are taken as English; the
+# langfilter.short / .shortcut / .detector trace counters show how often each
+# path is taken on a corpus (gg_api.py --trace). langdetect is unreliable on
+# short informal text, so a tweet is only dropped when it is confident.
+# Off by default; enable with GG_LANGFILTER=1 or gg_api.py --lang-filter.
+
+LANGS = {'en'}
+MIN_LETTERS = 12
+MIN_PROB = 0.9
+CACHE_PATH = os.path.join('.gg_cache', 'lang.pkl')
+
+ENABLED = bool(os.environ.get('GG_LANGFILTER'))
+
+_STRIP = re.compile(r'https?://\S+|www\.\S+|[@#]\w+|\bRT\b')
+_LETTERS = re.compile(r'[^\W\d_]')
+_WORDS = re.compile(r"[a-z']+")
+# English function words; ones that are also common words in other European
+# languages ('is', 'was', 'in', 'an', 'so', 'me', 'die', 'on', 'to', 'or') are left out
+_ENGLISH = frozenset({
+    'the', 'and', 'of', 'that', 'with', 'for', 'this', 'these', 'those', 'you', 'your', 'are', 'were',
+    'been', 'have', 'has', 'had', 'not', 'but', 'they', 'their', 'them', 'she', 'his', 'her', 'him',
+    'our', 'its', 'what', 'who', 'which', 'when', 'where', 'would', 'could', 'should', 'will', 'from',
+    'about', 'there', 'than', 'then', 'just', 'into', 'because', 'does', "don't", "it's", "can't",
+})
+
+_MEMO = {}
+_LOADED = [False]
+_DETECT = []
+_SELECTED = {}      # id(store) -> (store, filtered store); entries keep their store so ids stay unique
+MAX_SELECTED = 16   # a year's stores: the full one plus one per prefilter task
+
+
+def enable():
+    global ENABLED
+    ENABLED = True
+
+
+def _version():
+    """Tag of the rules language() follows; cached results made under other rules are ignored."""
+    rules = (MIN_LETTERS, MIN_PROB, sorted(_ENGLISH), _STRIP.pattern, _LETTERS.pattern, _WORDS.pattern)
+    return hashlib.blake2b(repr(rules).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def _key(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest()
+
+
+def _load():
+    if _LOADED[0]:
+        return
+    _LOADED[0] = True
+    try:
+        with open(CACHE_PATH, 'rb') as f:
+            saved = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return
+    if isinstance(saved, dict) and saved.get('version') == _version():
+        _MEMO.update(saved['memo'])
+
+
+def _save():
+    d = os.path.dirname(CACHE_PATH)
+    os.makedirs(d, exist_ok=True)
+    # a temp file per writer: parallel runs may save at the same time
+    fd, tmp = tempfile.mkstemp(dir=d, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump({'version': _version(), 'memo': _MEMO}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, CACHE_PATH)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _detector():
+    if not _DETECT:
+        try:
+            from langdetect import DetectorFactory, detect_langs
+            from langdetect.lang_detect_exception import LangDetectException
+        except ImportError:
+            print('langdetect is not installed; keeping tweets in every language')
+            _DETECT.append(None)
+            return None
+        DetectorFactory.seed = 0
+
+        def lang(text):
+            try:
+                best = detect_langs(text)[0]
+            except (LangDetectException, IndexError):
+                return None
+            return best.lang if best.prob >= MIN_PROB else ''
+        _DETECT.append(lang)
+    return _DETECT[0]
+
+
+def language(text):
+    """ISO code for a tweet; '' when it is too short or too unclear to judge, None if undetectable."""
+    body = _STRIP.sub(' ', text)
+    if len(_LETTERS.findall(body)) < MIN_LETTERS:
+        tracing.count('langfilter.short')
+        return ''
+    if len(_ENGLISH.intersection(_WORDS.findall(body.lower()))) >= 2:
+        tracing.count('langfilter.shortcut')
+        return 'en'
+    tracing.count('langfilter.detector')
+    detect = _detector()
+    return 'en' if detect is None else detect(body)
+
+
+def keep(texts):
+    """bool per text: is it in LANGS (or too short / undetectable to say)."""
+    _load()
+    out = np.ones(len(texts), dtype=bool)
+    fresh = 0
+    with tracing.span('langfilter', items_in=len(texts)) as sp:
+        for i, t in enumerate(texts):
+            k = _key(t)
+            lang = _MEMO.get(k, False)
+            tracing.cache('lang', lang is not False)
+            if lang is False:
+                lang = _MEMO[k] = language(t)
+                fresh += 1
+            if lang and lang not in LANGS:
+                out[i] = False
+        sp.set(items_out=int(out.sum()), detected=fresh)
+    if fresh:
+        _save()
+    return out
+
+
+def select(store):
+    """`store` without the tweets in other languages (the store itself when the filter is off)."""
+    if not ENABLED:
+        return store
+    hit = _SELECTED.get(id(store))
+    if hit is not None and hit[0] is store:
+        return hit[1]
+    flags = keep(store.unique_texts)
+    tracing.count('langfilter.dropped', int(np.count_nonzero(~flags[store.text_ids])))
+    sub = store if flags.all() else store.compact(flags)
+    if len(_SELECTED) >= MAX_SELECTED:
+        _SELECTED.clear()
+    _SELECTED[id(store)] = (store, sub)
+    return sub
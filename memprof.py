@@ -0,0 +1,189 @@
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+import tracing
+
+# Memory attribution per pipeline stage. When enabled, every tracing span
+# (load, clean, dataframe, nlp, party_map, ...) also becomes a memory stage:
+# tracemalloc gives the bytes a stage left allocated and its own peak, a
+# background thread samples RSS so native allocations (spaCy Docs, NumPy,
+# pandas) show up too, and shallow stages get their top allocation sites from
+# a snapshot diff around their first call. Enable with --profile-memory [path]
+# on gg_api.py or any module's __main__, or GG_PROFILE_MEMORY=<path>; the
+# report is written at exit. tracemalloc slows the run several times over, so
+# use it for attribution, not timing.
+
+DEFAULT_PATH = 'gg_memprof.json'
+SITE_DEPTH = 1      # snapshot diffs only for module spans and their children
+TOP_SITES = 8
+SAMPLE_S = 0.02
+
+_ENABLED = False
+_PATH = None
+_STACK = []
+_STAGES = {}
+_LOCK = threading.Lock()
+_MB = 1024.0 * 1024.0
+_NOT_OURS = (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__))
+
+
+def _rss():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class _Frame:
+    __slots__ = ('key', 'depth', 'cur0', 'peak', 'rss0', 'rss_max', 'snap')
+
+    def __init__(self, key, depth):
+        self.key = key
+        self.depth = depth
+        self.cur0, self.peak = tracemalloc.get_traced_memory()
+        self.rss0 = self.rss_max = _rss()
+        self.snap = _snapshot() if depth <= SITE_DEPTH and key not in _STAGES else None
+
+
+def _snapshot():
+    return tracemalloc.take_snapshot().filter_traces(_NOT_OURS)
+
+
+def _fold_peak():
+    # tracemalloc has one peak; charge it to every open stage before resetting
+    peak = tracemalloc.get_traced_memory()[1]
+    for fr in _STACK:
+        if peak > fr.peak:
+            fr.peak = peak
+    tracemalloc.reset_peak()
+
+
+class _Hook:
+    @staticmethod
+    def enter(span):
+        key = span.name if span.root == span.name else f'{span.root}.{span.name}'
+        with _LOCK:
+            _fold_peak()
+            _STACK.append(_Frame(key, len(_STACK)))
+
+    @staticmethod
+    def exit(span):
+        rss = _rss()
+        with _LOCK:
+            _fold_peak()
+            fr = _STACK.pop()
+            cur = tracemalloc.get_traced_memory()[0]
+        if rss > fr.rss_max:
+            fr.rss_max = rss
+        if _STACK and fr.rss_max > _STACK[-1].rss_max:
+            _STACK[-1].rss_max = fr.rss_max
+        st = _STAGES.setdefault(fr.key, {
+            'calls': 0, 'net_alloc_mb': 0.0, 'peak_alloc_mb': 0.0,
+            'rss_delta_mb': 0.0, 'rss_peak_mb': 0.0, 'sites': {},
+        })
+        st['calls'] += 1
+        st['net_alloc_mb'] += (cur - fr.cur0) / _MB
+        st['peak_alloc_mb'] = max(st['peak_alloc_mb'], (fr.peak - fr.cur0) / _MB)
+        st['rss_delta_mb'] += (rss - fr.rss0) / _MB
+        st['rss_peak_mb'] = max(st['rss_peak_mb'], fr.rss_max / _MB)
+        if fr.snap is not None:
+            diff = _snapshot().compare_to(fr.snap, 'lineno')
+            sites = st['sites']
+            for d in diff[:TOP_SITES]:
+                if d.size_diff < 4096:
+                    continue
+                where = f'{d.traceback[0].filename}:{d.traceback[0].lineno}'
+                sites[where] = sites.get(where, 0.0) + d.size_diff / _MB
+
+
+def _sampler():
+    while _ENABLED:
+        rss = _rss()
+        with _LOCK:
+            for fr in _STACK:
+                if rss > fr.rss_max:
+                    fr.rss_max = rss
+        time.sleep(SAMPLE_S)
+
+
+def enabled():
+    return _ENABLED
+
+
+def enable(path=None):
+    """Start tracemalloc and RSS sampling; the report goes to path (default gg_memprof.json) at exit."""
+    global _ENABLED, _PATH
+    _PATH = path or _PATH or DEFAULT_PATH
+    if _ENABLED:
+        return
+    _ENABLED = True
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    tracing.add_hook(_Hook)
+    threading.Thread(target=_sampler, name='memprof-rss', daemon=True).start()
+    atexit.register(_flush)
+
+
+def cli(argv):
+    """Handle --profile-memory [path.json] in a module's argv; returns the remaining args."""
+    if '--profile-memory' not in argv:
+        return list(argv)
+    argv = list(argv)
+    i = argv.index('--profile-memory')
+    path = None
+    if i + 1 < len(argv) and argv[i + 1].endswith('.json'):
+        path = argv.pop(i + 1)
+    argv.pop(i)
+    enable(path)
+    return argv
+
+
+def report():
+    stages = {}
+    for key, st in _STAGES.items():
+        top = sorted(st['sites'].items(), key=lambda kv: kv[1], reverse=True)[:TOP_SITES]
+        stages[key] = dict(
+            {k: (round(v, 2) if isinstance(v, float) else v) for k, v in st.items() if k != 'sites'},
+            top_sites=[{'site': s, 'mb': round(mb, 2)} for s, mb in top],
+        )
+    cur = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+    return {
+        'rss_mb': round(_rss() / _MB, 1),
+        'traced_current_mb': round(cur / _MB, 2),
+        'stages': stages,
+    }
+
+
+def export(path=None):
+    path = path or _PATH or DEFAULT_PATH
+    rep = report()
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(rep, f, indent=2)
+    os.replace(tmp, path)
+    return path, rep
+
+
+def _flush():
+    global _ENABLED
+    if not _ENABLED:
+        return
+    _ENABLED = False
+    path, rep = export()
+    print(f"\n{'stage':<28}{'calls':>6}{'net MB':>10}{'peak MB':>10}{'RSS +MB':>10}{'RSS max':>10}")
+    for key, st in sorted(rep['stages'].items(), key=lambda kv: -kv[1]['peak_alloc_mb']):
+        print(f"{key:<28}{st['calls']:>6}{st['net_alloc_mb']:>10.1f}{st['peak_alloc_mb']:>10.1f}"
+              f"{st['rss_delta_mb']:>10.1f}{st['rss_peak_mb']:>10.1f}")
+    print(f'Wrote memory profile to {path}')
+
+
+if os.environ.get('GG_PROFILE_MEMORY'):
+    enable(None if os.environ['GG_PROFILE_MEMORY'] == '1' else os.environ['GG_PROFILE_MEMORY'])
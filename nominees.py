@@ -1,61 +1,21 @@
-import json
 import re
-from collections import Counter, defaultdict
+import sys
 
+import numpy as np
 import spacy
-from spacy.matcher import Matcher
-from fuzzywuzzy import fuzz, process
-import nltk
-from nltk.corpus import stopwords    
-import sys
+from fuzzywuzzy import fuzz
 
-
-def _ensure_nltk():
-    try:
-        need = [
-            ("punkt", "tokenizers/punkt"),
-            ("punkt_tab", "tokenizers/punkt_tab"),
-            ("averaged_perceptron_tagger", "taggers/averaged_perceptron_tagger"),
-            ("averaged_perceptron_tagger_eng", "taggers/averaged_perceptron_tagger_eng"),
-            ("stopwords", "corpora/stopwords"),
-        ]
-        for pkg, path in need:
-            try:
-                nltk.data.find(path)
-            except LookupError:
-                nltk.download(pkg, quiet=True)
-    except Exception:
-        pass
-
-_ensure_nltk()
-
-STOP = set(stopwords.words("english")) if hasattr(stopwords, "words") else set()
-STOP.update({"-", "–", "—", "performance", "television", "tv", "series", "motion", "picture", "award"})
-
-AWARD_NAMES = [
-    'cecil b. demille award', 'best motion picture - drama',
-    'best performance by an actress in a motion picture - drama',
-    'best performance by an actor in a motion picture - drama',
-    'best motion picture - comedy or musical',
-    'best performance by an actress in a motion picture - comedy or musical',
-    'best performance by an actor in a motion picture - comedy or musical',
-    'best animated feature film', 'best foreign language film',
-    'best performance by an actress in a supporting role in a motion picture',
-    'best performance by an actor in a supporting role in a motion picture',
-    'best director - motion picture', 'best screenplay - motion picture',
-    'best original score - motion picture', 'best original song - motion picture',
-    'best television series - drama',
-    'best performance by an actress in a television series - drama',
-    'best performance by an actor in a television series - drama',
-    'best television series - comedy or musical',
-    'best performance by an actress in a television series - comedy or musical',
-    'best performance by an actor in a television series - comedy or musical',
-    'best mini-series or motion picture made for television',
-    'best performance by an actress in a mini-series or motion picture made for television',
-    'best performance by an actor in a mini-series or motion picture made for television',
-    'best performance by an actress in a supporting role in a series, mini-series or motion picture made for television',
-    'best performance by an actor in a supporting role in a series, mini-series or motion picture made for television'
-]
+import adaptive
+import artifacts
+import gazetteer
+import langfilter
+import memprof
+import prefilter
+import tagging
+import tracing
+import tweet_store
+import vocab
+from award_plans import AWARD_NAMES, build_plans, get_plan
 
 
 def get_top_percent(d, percentile=None, pct=None):
@@ -66,15 +26,9 @@ def get_top_percent(d, percentile=None, pct=None):
         frac = float(percentile)
     elif pct is not None:
         frac = float(pct)
-    m = max(d.values())
-    if m <= 0:
-        return []
-    thr = m * frac
-    return [k for k, v in d.items() if v > thr]
-
-
-def _simple_tokens(s):
-    return re.findall(r"[A-Za-z]+(?:'[A-Za-z]+)?", s.lower())
+    keys = list(d)
+    vals = np.fromiter(d.values(), dtype=np.float64, count=len(keys))
+    return [keys[i] for i in vocab.above_fraction(vals, frac)]
 
 
 def _clean_text(t):
@@ -91,107 +45,98 @@ def _clean_text(t):
 
 
 def get_tweet_data(year):
-    path = f"gg{year}.json"
-    with open(path, "r", encoding="utf-8") as f:
-        raw = json.load(f)
-    return [_clean_text(t.get("text", "")) for t in raw]
+    store = langfilter.select(prefilter.select(tweet_store.load(year), prefilter.NOMINEES))
+    with tracing.span("clean", items_in=len(store)):
+        return store.map_texts(_clean_text)
 
 
 def tweets_contain(category, tweets):
-    toks = [w for w in _simple_tokens(category) if w not in STOP]
-    if not toks:
+    plan = get_plan(category)
+    rg = plan.nom_pattern
+    if rg is None:
         return []
-    rg = re.compile(".*?".join(map(re.escape, toks)), re.IGNORECASE)
     hits = [t for t in tweets if rg.search(t)]
-    if "act" not in category.lower():
+    if not plan.mentions_act:
         hits = [t for t in hits if "act" not in t.lower()]  # reduce bleed
     return hits
 
 
 def remove_category_tokens(category, counts_dict):
-    bad = set(_simple_tokens(category))
-    bad.update({"motion", "picture", "golden", "globe", "globes", "television", "series", "tv", "mini"})
+    rx = get_plan(category).nom_exclude
     for k in list(counts_dict.keys()):
-        if any(b in k.lower() for b in bad):
+        if rx.search(k.lower()):
             counts_dict[k] = 0
     return counts_dict
 
 
-def _build_matcher(nlp):
-    m = Matcher(nlp.vocab)
-    pat = [{"POS": "PROPN"}, {"POS": "PROPN", "OP": "?"}]
-    try:
-        m.add("FULL_NAME", [pat])
-    except TypeError:
-        m.add("FULL_NAME", None, pat)
-
-    return m
-
-
-def _person_candidates(tweets, nlp, matcher):
+def _person_candidates(tweets, nlp):
     names = set()
-    for t in tweets:
-        doc = nlp(t)
-        for e in doc.ents:
-            if e.label_ == "PERSON":
-                names.add(e.text)
-        for _, s, e in matcher(doc):
-            span = doc[s:e].text
-            if len(span.split()) >= 2:
-                names.add(span)
+    for a in tagging.annotate(tweets, nlp):
+        names.update(a.persons)
+        names.update(span for span in a.names if len(span.split()) >= 2)
     return list(names)
 
 
-def _title_candidates(tweets, nlp):
+def _title_candidates(tweets, nlp, min_count=3):
     titles = set()
-    for t in tweets:
-        doc = nlp(t)
-        for e in doc.ents:
-            if e.label_ in {"WORK_OF_ART", "ORG"}:
-                titles.add(e.text)
+    for a in tagging.annotate(tweets, nlp):
+        titles.update(a.titles)
 
-    cnt = Counter()
-    for t in tweets:
-        tokens = nltk.pos_tag(_simple_tokens(t))
-        for w, tag in tokens:
-            if tag in ("NNP", "NNPS"):
-                cnt[w.lower()] += 1
+    cnt = tagging.nnp_counts(tweets, nlp)
     for k, v in cnt.items():
-        if v >= 3:
+        if v >= min_count:
             titles.add(k)
     return list(titles)
 
 
 def count_name_mentions(tweets, candidates, fuzzy=True, min_ratio=85):
-    counts = {c: 0 for c in candidates}
+    low = [c.lower() for c in candidates]
+    hits = []
     for t in tweets:
         tl = t.lower()
         if fuzzy:
             # token_set helps with variations
-            for c in candidates:
-                if fuzz.token_set_ratio(c.lower(), tl) >= min_ratio:
-                    counts[c] += 1
+            tracing.count("fuzzy.comparisons", len(low))
+            hits.extend(i for i, cl in enumerate(low) if fuzz.token_set_ratio(cl, tl) >= min_ratio)
         else:
-            for c in candidates:
-                if c.lower() in tl:
-                    counts[c] += 1
-    return counts
+            hits.extend(i for i, cl in enumerate(low) if cl in tl)
+    counts = vocab.count(hits, len(candidates))
+    return dict(zip(candidates, counts.tolist()))
 
 
-def get_category_nominees(category, tweets, nlp, matcher):
-    cat_tweets = tweets_contain(category, tweets)
-    if not cat_tweets:
-        return []
+def get_category_nominees(category, tweets, nlp, cat_tweets=None):
+    with tracing.span("category", module="nominees", category=category):
+        return _category_nominees(category, tweets, nlp, cat_tweets)
 
-    if ("actor" in category.lower()) or ("actress" in category.lower()):
-        cands = _person_candidates(cat_tweets, nlp, matcher)
+
+def _count(category, cat_tweets, nlp, scale=1.0):
+    """Mention counts; scale is the share of the category's tweets given (adaptive counts prefixes)."""
+    if get_plan(category).is_person:
+        cands = _person_candidates(cat_tweets, nlp)
         counts = count_name_mentions(cat_tweets, cands, fuzzy=True, min_ratio=85)
     else:
-        cands = _title_candidates(cat_tweets, nlp)
+        cands = _title_candidates(cat_tweets, nlp, min_count=3 * scale)
         counts = count_name_mentions(cat_tweets, cands, fuzzy=True, min_ratio=80)
+    return remove_category_tokens(category, counts)
+
+
+def _category_nominees(category, tweets, nlp, cat_tweets):
+    with tracing.span("filter", items_in=len(tweets)) as sp:
+        if cat_tweets is None:
+            cat_tweets = tweets_contain(category, tweets)
+        sp.set(items_out=len(cat_tweets))
+    if not cat_tweets:
+        return []
+
+    with tracing.span("count", items_in=len(cat_tweets)) as sp:
+        counts = adaptive.settle(cat_tweets, category,
+                                 lambda ts: _count(category, ts, nlp, len(ts) / len(cat_tweets)), ratio=0.5, cap=4)
+        sp.set(candidates=len(counts))
 
-    counts = remove_category_tokens(category, counts)
     top = get_top_percent(counts, percentile=0.5)
+    if adaptive.ENABLED and len(top) > 4:
+        # adaptive's stopping test settles the top 4 by count, so keep those
+        top = sorted(top, key=counts.get, reverse=True)
 
     if not top:
         top = [k for k, _ in sorted(counts.items(), key=lambda kv: kv[1], reverse=True)[:4]]
@@ -199,7 +144,16 @@ def get_category_nominees(category, tweets, nlp, matcher):
     return [t.strip().lower() for t in top][:4]
 
 
-def run_nominees(year):
+def run_nominees(year, mode=None):
+    """mode="cooccur" reads nominees off the shared co-occurrence matrix (see cooccur)."""
+    with tracing.span("nominees", year=str(year)):
+        if mode == "cooccur":
+            import cooccur
+            return cooccur.nominees(year)
+        return _run_nominees(year)
+
+
+def _run_nominees(year):
     tweets = get_tweet_data(year)
     try:
         nlp = spacy.load("en_core_web_sm")
@@ -207,21 +161,30 @@ def run_nominees(year):
         from spacy.cli import download
         download("en_core_web_sm")
         nlp = spacy.load("en_core_web_sm")
-    matcher = _build_matcher(nlp)
-
 
     categories = AWARD_NAMES if str(year) in {"2013"} else AWARD_NAMES
+    build_plans(categories)
+    bundle = artifacts.load(year)
+    if bundle is not None:
+        bundle.preload_annotations(nlp)
+    routes = {cat: bundle.routed("nominees", cat) if bundle is not None else None for cat in categories}
+    guess = None
+    if gazetteer.ENABLED:
+        routes = {cat: tweets_contain(cat, tweets) if r is None else r for cat, r in routes.items()}
+        guess = gazetteer.for_tagging(list(routes.values()), nlp).annotation
     out = {}
-    for cat in categories:
-        noms = get_category_nominees(cat, tweets, nlp, matcher)
-        while len(noms) < 4:
-            noms.append("l")
-        out[cat] = noms
+    with tagging.guessing(guess):
+        for cat in categories:
+            noms = get_category_nominees(cat, tweets, nlp, routes[cat])
+            while len(noms) < 4:
+                noms.append("l")
+            out[cat] = noms
     return out
 
 
 if __name__ == "__main__":
-    yr = sys.argv[1] if len(sys.argv) > 1 else "2013"
+    args = memprof.cli(sys.argv[1:])
+    yr = args[0] if args else "2013"
     res = run_nominees(yr)
     for k, v in res.items():
         print(k, ":", ", ".join(v))
@@ -1,18 +1,28 @@
 import re
 import sys
-import json
+import string
+from array import array
 from collections import defaultdict, Counter
 
 import spacy
 from nltk import download as _nltk_dl
 from nltk.sentiment import SentimentIntensityAnalyzer
 
+import langfilter
+import hashtags
+import memprof
+import prefilter
+import sketches
+import tracing
+import tweet_store
+
 RE_SPACES = re.compile(r"\s+")
-RE_CAMEL = re.compile(r"[A-Z][a-z]*|[A-Z]+(?![a-z])|[a-z]+")
 RE_HASHTAGS = re.compile(r"#([A-Za-z][A-Za-z0-9\-]+)")
 RE_AFTER_PARTY = re.compile(r"\bafter\s*party\b")
 RE_STRIP = re.compile(r"[ ,.:;!?\"'()\[\]{}\_/\\]+$")
 
+PARTY_SAMPLE = 64   # tweets kept per party label when sketches are on
+
 
 def _ensure_vader():
     try:
@@ -45,20 +55,12 @@ def _norm(s):
     s = s.strip(" ,.:;!?\"'()[]{}_/\\")
     return s
 
-def _split_camel(tag):
-    parts = RE_CAMEL.findall(tag)
-    return " ".join(p.lower() for p in parts) if parts else None
-
-
-
 def _hashtag_parties(raw_text):
     out = []
     for tag in RE_HASHTAGS.findall(raw_text):
-        low = tag.lower()
-        if "party" not in low:
+        if "party" not in tag.lower():
             continue
-        s = _split_camel(tag) or low
-        s = s.replace("-", " ")
+        s = hashtags.phrase(tag)
         if "party" in s:
             out.append(_norm(s))
     return out
@@ -116,6 +118,7 @@ def _extract_parties(nlp, raw_text):
     
     out = []
     out += _hashtag_parties(raw_text)
+    tracing.count("nlp.docs")
     doc = nlp(t)
     out += _around_party_phrase(doc)
     out += _ner_party_brands(doc)
@@ -126,76 +129,271 @@ def _extract_parties(nlp, raw_text):
 
     return list(dict.fromkeys(out))
 
+_AFTER = " after party"
+
+
+class _LabelTrie:
+    """Character trie over party labels. Each node is [children, first id below it, ids ending here]."""
+
+    def __init__(self):
+        self.root = [{}, None, []]
+
+    def insert(self, word, lid):
+        node = self.root
+        if node[1] is None:
+            node[1] = lid
+        for ch in word:
+            nxt = node[0].get(ch)
+            if nxt is None:
+                nxt = node[0][ch] = [{}, lid, []]
+            node = nxt
+        node[2].append(lid)
+
+    def _find(self, prefix):
+        node = self.root
+        for ch in prefix:
+            node = node[0].get(ch)
+            if node is None:
+                return None
+        return node
+
+    def first_under(self, prefix):
+        node = self._find(prefix)
+        return None if node is None else node[1]
+
+    def under(self, prefix):
+        node = self._find(prefix)
+        out = []
+        stack = [node] if node is not None else []
+        while stack:
+            n = stack.pop()
+            out.extend(n[2])
+            stack.extend(n[0].values())
+        return out
+
+    def along(self, word):
+        """Ids of every inserted word that is a prefix of `word`."""
+        node = self.root
+        out = list(node[2])
+        for ch in word:
+            node = node[0].get(ch)
+            if node is None:
+                break
+            out.extend(node[2])
+        return out
+
+
 def _merge_labels(labels):
-    base = [re.sub(r"\s+", " ", s.replace(" after party", " after party")).strip() for s in labels]
+    base = [re.sub(r"\s+", " ", s).strip() for s in labels]
     counts = Counter(base)
     merged = []
+    exact = {}
+    bases = _LabelTrie()    # a[:-12] for merged "x after party" labels
+    full = _LabelTrie()     # every merged label
     for s, c in counts.most_common():
-        for m in merged:
-            a, n = m
-            if (
-                a == s or
-                (a.endswith(" after party") and s.startswith(a[:-12])) or
-                (s.endswith(" after party") and a.startswith(s[:-12]))
-            ):
-                m[1] += c
-                break
-        else:
-            merged.append([s, c])
+        hits = [exact.get(s)]
+        hits.extend(bases.along(s))
+        if s.endswith(_AFTER):
+            hits.append(full.first_under(s[:-12]))
+        hits = [h for h in hits if h is not None]
+        if hits:
+            merged[min(hits)][1] += c
+            continue
+        idx = len(merged)
+        merged.append([s, c])
+        exact[s] = idx
+        full.insert(s, idx)
+        if s.endswith(_AFTER):
+            bases.insert(s[:-12], idx)
     merged.sort(key=lambda x: x[1], reverse=True)
     return merged
 
+
+def _party_members(keys, rank):
+    """Indices into keys per ranked party, covering "x party" / "x after party" variants."""
+    by_key = _LabelTrie()
+    by_stem = _LabelTrie()
+    pos = {}
+    for i, key in enumerate(keys):
+        pos[key] = i
+        by_key.insert(key, i)
+        by_stem.insert(key.replace(_AFTER, ""), i)
+    members = []
+    for p in rank:
+        hit = set(by_key.under(p.replace(_AFTER, "")))
+        hit.update(by_stem.along(p))
+        if p in pos:
+            hit.add(pos[p])
+        members.append(sorted(hit))
+    return members
+
+
+def _party_groups(party_map, rank):
+    """Tweet ids per ranked party, covering "x party" / "x after party" variants, in first-seen order."""
+    keys = list(party_map)
+    groups = []
+    for hit in _party_members(keys, rank):
+        ids = []
+        for i in hit:
+            ids.extend(party_map[keys[i]])
+        groups.append(list(dict.fromkeys(ids)))
+    return groups
+
+
+def _sketch_party_map(store, nlp, stage):
+    """Bounded party_map: heavy-hitter label counts over distinct tweets, a reservoir of tweets per label.
+
+    Also returns the labels each sampled tweet carries, per label, for _sketch_mentions."""
+    counts = sketches.HeavyHitters()
+    samples = {}
+    for raw in store.unique_texts:
+        labs = tuple(_extract_parties(nlp, raw))
+        for lb in labs:
+            evicted = counts.add(lb)
+            if evicted is not None:
+                samples.pop(evicted, None)
+            res = samples.get(lb)
+            if res is None:
+                res = samples[lb] = sketches.Reservoir(PARTY_SAMPLE)
+            res.add((raw, labs))
+    keep = counts.to_dict()
+    party_map = {lb: [stage.add(raw) for raw, _ in samples[lb].items] for lb in keep}
+    tagged = {lb: [labs for _, labs in samples[lb].items] for lb in keep}
+    return party_map, counts, tagged
+
+
+def _sketch_mentions(labels, counts, tagged):
+    """Estimated distinct tweets carrying any of labels (one party's variants).
+
+    Each label adds its count times the share of its sample that carries none of the labels
+    before it, so a tweet tagged both "x party" and "x after party" is counted once."""
+    n = 0.0
+    for j, lb in enumerate(labels):
+        seen = labels[:j]
+        sample = tagged[lb]
+        fresh = sum(1 for labs in sample if not any(l in labs for l in seen))
+        n += counts.count(lb) * fresh / max(1, len(sample))
+    return int(round(n))
+
+
+class _SentimentStage:
+    """VADER scores per distinct normalized tweet, kept in flat arrays indexed by tweet id."""
+
+    def __init__(self, sia):
+        self.sia = sia
+        self.lexicon = getattr(sia, "lexicon", None)
+        self.ids = {}
+        self.texts = []
+        self.scored = bytearray()
+        self.compound = array("d")
+        self.pos = array("d")
+        self.neg = array("d")
+
+    def add(self, raw):
+        key = _norm(raw)
+        tid = self.ids.get(key)
+        if tid is None:
+            tid = self.ids[key] = len(self.texts)
+            self.texts.append(raw)
+            self.scored.append(0)
+            self.compound.append(0.0)
+            self.pos.append(0.0)
+            self.neg.append(0.0)
+        return tid
+
+    def _needs_vader(self, text):
+        # VADER only scores lexicon words (boosters, negations and idioms just
+        # adjust them), so a tweet sharing no token with the lexicon is exactly 0.
+        if self.lexicon is None or not text.isascii():
+            return True
+        toks = set()
+        for w in text.lower().split():
+            toks.add(w)
+            toks.add(w.strip(string.punctuation))
+        return not self.lexicon.keys().isdisjoint(toks)
+
+    def score(self, ids):
+        for tid in ids:
+            if self.scored[tid]:
+                continue
+            self.scored[tid] = 1
+            text = self.texts[tid]
+            if not self._needs_vader(text):
+                tracing.count("vader.skipped")
+                continue
+            tracing.count("vader.calls")
+            s = self.sia.polarity_scores(text)
+            self.compound[tid] = s["compound"]
+            self.pos[tid] = s["pos"]
+            self.neg[tid] = s["neg"]
+
+
 def run_parties(year, top_k=10):
-    with open(f"gg{year}.json", encoding="utf-8") as f:
-        data = json.load(f)
+    with tracing.span("parties", year=str(year)):
+        return _run_parties(year, top_k)
+
+
+def _run_parties(year, top_k):
+    full = tweet_store.load(year)
+    hashtags.build(full)
+    store = langfilter.select(prefilter.select(full, prefilter.PARTIES))
 
     nlp = spacy.load("en_core_web_sm")
     _ensure_vader()
     sia = SentimentIntensityAnalyzer()
+    stage = _SentimentStage(sia)
+
+    counts = None
+    if sketches.enabled():
+        # mentions become estimated distinct-tweet counts per party (distinct raw texts, where the
+        # default path dedups normalized ones); sentiment and samples come from the reservoirs
+        with tracing.span("party_map", items_in=store.n_unique) as sp:
+            party_map, counts, tagged = _sketch_party_map(store, nlp, stage)
+            sp.set(items_out=len(party_map), texts=len(stage.texts), sketch_error=counts.error_bound())
+    else:
+        party_map = defaultdict(list)
+        with tracing.span("nlp", items_in=len(store)):
+            labels = store.map_texts(lambda raw: _extract_parties(nlp, raw))
+        with tracing.span("party_map", items_in=len(store)) as sp:
+            for raw, labs in zip(store.texts, labels):
+                if not labs:
+                    continue
+                tid = stage.add(raw)
+                for lb in labs:
+                    party_map[lb].append(tid)
+            sp.set(items_out=len(party_map), texts=len(stage.texts))
+
+    with tracing.span("merge", items_in=len(party_map)) as sp:
+        merged = _merge_labels(list(party_map.keys()))
+        rank = [p for p, _ in merged[: max(top_k, 1)]]
+        groups = _party_groups(party_map, rank)
+        if counts is None:
+            mentions = [len(g) for g in groups]
+        else:
+            keys = list(party_map)
+            mentions = [_sketch_mentions([keys[i] for i in hit], counts, tagged) for hit in _party_members(keys, rank)]
+        sp.set(items_out=len(rank))
 
-    party_map = defaultdict(list)
-    for it in data:
-        raw = it.get("text", "")
-        labs = _extract_parties(nlp, raw)
-        if not labs:
-            continue
-        for lb in labs:
-            party_map[lb].append(raw)
-
-    merged = _merge_labels(list(party_map.keys()))
-    rank = [p for p, _ in merged[: max(top_k, 1)]]
+    with tracing.span("sentiment"):
+        stage.score(dict.fromkeys(tid for ids in groups for tid in ids))
 
     stats = []
-    for p in rank:
-        tweets = []
-        for key in party_map:
-            if key == p or key.startswith(p.replace(" after party", "")) or p.startswith(key.replace(" after party", "")):
-                tweets.extend(party_map[key])
-        seen_t = set()
-        dedup = []
-
-
-        for tw in tweets:
-            tnorm = _norm(tw)
-            if tnorm in seen_t:
-                continue
-            seen_t.add(tnorm)
-            dedup.append(tw)
+    for p, dedup, n in zip(rank, groups, mentions):
         pos = neg = neu = 0
         comp = 0.0
-        for tw in dedup:
-            s = sia.polarity_scores(tw)
-            comp += s["compound"]
-            if s["compound"] >= 0.2:
+        for tid in dedup:
+            c = stage.compound[tid]
+            comp += c
+            if c >= 0.2:
                 pos += 1
-            elif s["compound"] <= -0.2:
+            elif c <= -0.2:
                 neg += 1
             else:
                 neu += 1
         total = max(1, len(dedup))
         stats.append({
             "party": p,
-            "mentions": len(dedup),
+            "mentions": n,
             "pos": pos,
             "neg": neg,
             "neu": neu,
@@ -203,7 +401,7 @@ def run_parties(year, top_k=10):
             "neg_pct": round(100.0 * neg / total, 1),
             "neu_pct": round(100.0 * neu / total, 1),
             "avg_compound": round(comp / total, 3),
-            "samples": dedup[:3]
+            "samples": [stage.texts[tid] for tid in dedup[:3]]
         })
 
 
@@ -223,5 +421,5 @@ def run_parties(year, top_k=10):
 
 
 if __name__ == "__main__":
-    y = sys.argv[1] if len(sys.argv) > 1 else "2013"
-    run_parties(y)
+    args = memprof.cli(sys.argv[1:])
+    run_parties(args[0] if args else "2013")
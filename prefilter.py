@@ -0,0 +1,114 @@
+import os
+
+import numpy as np
+
+import tracing
+from award_plans import AWARD_NAMES, PRESENTER_VERBS, build_plans
+
+# First-stage relevance filter. Each distinct text gets a flag per task it
+# could matter to, from a vectorized keyword search over the store's whole
+# lowercased buffer (match offsets are mapped back to text ids with
+# searchsorted). A task's keywords are substrings every tweet it keeps must
+# contain ('host', 'best'/'award', each award's first win/nomination token, a
+# presenter keyword *and* a word of a presenter verb, 'dressed', 'party'),
+# matched as single words because the modules match on cleaned text whose
+# whitespace differs from the raw tweet's, so the filter only drops
+# tweets the module would drop anyway and the outputs do not change. Texts
+# with non-ASCII bytes are kept for every task, since str.lower() can fold
+# those onto ASCII letters. Modules read select(store, TASK), a compacted
+# store of just those tweets; a task's flags are computed the first time it
+# is asked for. Disable with GG_NO_PREFILTER=1.
+
+HOSTS, AWARDS, WINNERS, NOMINEES, PRESENTERS, REDCARPET, PARTIES = (1 << i for i in range(7))
+
+ENABLED = not os.environ.get('GG_NO_PREFILTER')
+
+_CACHE = [None, None, {}, {}]   # store, (lowercased buffer, non-ASCII flags), {bit: mask}, {task: store}
+
+
+def _keywords(bit):
+    """Keyword groups for one task bit; a text is relevant when it hits every group."""
+    if bit == HOSTS:
+        return [['host']]
+    if bit == AWARDS:
+        return [['best', 'award']]
+    if bit == REDCARPET:
+        return [['dressed']]
+    if bit == PARTIES:
+        return [['party']]
+    plans = build_plans(AWARD_NAMES)
+    if bit == WINNERS:
+        return [[p.win_tokens[0] for p in plans if p.win_tokens]]
+    if bit == NOMINEES:
+        return [[p.nom_tokens[0] for p in plans if p.nom_tokens]]
+    # presenters keeps a tweet holding all of an award's keywords and a verb
+    if any(not p.presenter_keywords for p in plans):
+        return [_verb_stems()]
+    return [_verb_stems(), [p.presenter_keywords[0] for p in plans]]
+
+
+def _verb_stems():
+    """Single words covering every presenter verb ('on stage with' -> 'stage').
+
+    presenters matches its verbs on cleaned text, where whitespace is collapsed and URLs are gone,
+    so a phrase it finds there may be split differently in the raw text; one of its words is not."""
+    words = {max(v.split(), key=len) for v in PRESENTER_VERBS}
+    return sorted(w for w in words if not any(o != w and o in w for o in words))
+
+
+def _hits(low, offsets, words):
+    """bool per distinct text: does it contain any of `words`."""
+    hit = np.zeros(len(offsets) - 1, dtype=bool)
+    ends = offsets[1:]
+    for w in dict.fromkeys(words):
+        w = np.frombuffer(w.encode(), dtype=np.uint8)
+        at = np.flatnonzero(low[:low.size - w.size + 1] == w[0])
+        for k in range(1, w.size):
+            at = at[low[at + k] == w[k]]
+        tid = np.searchsorted(offsets, at, side='right') - 1
+        # the buffer has no separators, so drop matches running into the next text
+        hit[tid[at + w.size <= ends[tid]]] = True
+    return hit
+
+
+def _state(store):
+    if _CACHE[0] is not store:
+        raw = np.frombuffer(store.buffer, dtype=np.uint8)
+        offsets = np.asarray(store.offsets, dtype=np.int64)
+        low = np.frombuffer(raw.tobytes().lower(), dtype=np.uint8)
+        wide = np.zeros(store.n_unique, dtype=bool)
+        wide[np.searchsorted(offsets, np.flatnonzero(raw >= 0x80), side='right') - 1] = True
+        _CACHE[:] = [store, (low, offsets, wide), {}, {}]
+    return _CACHE[1]
+
+
+def relevant(store, task):
+    """bool per distinct text of `store`: may it matter to any task bit in `task`."""
+    low, offsets, wide = _state(store)
+    out = wide.copy()
+    for bit in (b for b in (HOSTS, AWARDS, WINNERS, NOMINEES, PRESENTERS, REDCARPET, PARTIES) if task & b):
+        m = _CACHE[2].get(bit)
+        if m is None:
+            with tracing.span('prefilter', task=bit, items_in=store.n_unique) as sp:
+                groups = _keywords(bit)
+                m = _hits(low, offsets, groups[0])
+                for words in groups[1:]:
+                    m &= _hits(low, offsets, words)
+                sp.set(items_out=int(np.count_nonzero(m)))
+            _CACHE[2][bit] = m
+        out |= m
+    return out
+
+
+def select(store, task):
+    """`store` cut down to the tweets whose text may matter to `task`."""
+    if not ENABLED:
+        return store
+    sub = _CACHE[3].get(task) if _CACHE[0] is store else None
+    if sub is None:
+        keep = relevant(store, task)
+        sub = store if keep.all() else store.compact(keep)
+        _CACHE[3][task] = sub
+        tracing.count('prefilter.kept', len(sub))
+        tracing.count('prefilter.dropped', len(store) - len(sub))
+    return sub
@@ -1,16 +1,21 @@
-import numpy as np
 import pandas as pd
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
 import spacy
-import json
-import string
 import re
-from fuzzywuzzy import process, fuzz
 from collections import Counter
+from fuzzywuzzy import fuzz
 from spacy.matcher import Matcher
 
+import adaptive
+import artifacts
+import gazetteer
+import langfilter
+import memprof
+import prefilter
+import tracing
+import tweet_store
+import vocab
+from award_plans import AWARD_NAMES, PRESENTER_VERBS, build_plans, get_plan
+
 # Precompile regex patterns once at module level
 URL_RE = re.compile(r'https?://\S+|www\.\S+')
 AMP_RE = re.compile(r'&amp;')
@@ -36,19 +41,16 @@ def normalize_text(t):
     return t
 
 
-def get_tweet_data(year):
-    path = f'gg{year}.json'
-    with open(path, 'r', encoding='utf-8') as f:
-        raw = json.load(f)
-
-    # Combine cleaning steps inline for efficiency
-    def clean_text(x):
-        t = x.get('text', '')
-        t = remove_symbols(t)
-        return normalize_text(t)
+def clean_text(t):
+    return normalize_text(remove_symbols(t))
 
-    texts = [clean_text(x) for x in raw]
-    return pd.DataFrame({'text': texts})
+def get_tweet_data(year, store=None):
+    store = store if store is not None else langfilter.select(
+        prefilter.select(tweet_store.load(year), prefilter.PRESENTERS))
+    with tracing.span('clean', items_in=len(store)):
+        texts = store.map_texts(clean_text)
+    with tracing.span('dataframe', items_in=len(texts)):
+        return pd.DataFrame({'text': texts})
 
 _PUNCT_TABLE = str.maketrans('', '', r'''!()-[]{};:'"\,<>./?@#$%^&*_~''')
 
@@ -83,9 +85,9 @@ def filter_names(name_lst):
 def compute_mode(names, k=2):
     if not names:
         return []
-    counts = Counter(names)
+    v, counts = vocab.tally(names)
     # Take top k directly
-    return [n for n, _ in counts.most_common(k)]
+    return v.decode(vocab.top_k(counts, k))
 
 
 
@@ -95,6 +97,7 @@ def remove_similar_names(names, cutoff=60):
     seen = set()
 
     for name in res:
+        tracing.count('fuzzy.comparisons', len(keep))
         if any(fuzz.ratio(name, k) >= cutoff for k in keep):
             continue
         keep.append(name)
@@ -105,23 +108,7 @@ def remove_similar_names(names, cutoff=60):
 
 
 def get_keywords_of_award(award):
-    s = award.translate(str.maketrans('', '', string.punctuation))
-    toks = [w.lower() for w in word_tokenize(s) if w.lower() not in stopwords.words('english')]
-    repl = {
-        'television': 'series',
-        'animated': 'animat',
-        'supporting': 'support'
-    }
-
-    drop = {
-        'best','award','performance','made','feature','film','role','motion','picture','series','comedy','musical'
-    }
-    out = []
-    for w in toks:
-        if w in drop:
-            continue
-        out.append(repl.get(w, w))
-    return " ".join(out)
+    return " ".join(get_plan(award).presenter_keywords)
 
 def get_tweets(keywords, df):
     keys = [k.lower() for k in keywords]
@@ -235,6 +222,21 @@ def _build_matcher(nlp):
         m.add('FULL_NAME', None, pat)
     return m
 
+# text -> get_person result; shared across awards, preloaded from artifacts
+_PERSONS = {}
+# set during a gazetteer-mode run: finds the names of texts not in _PERSONS
+_GAZETTEER = [None]
+
+def _persons(text, nlp, matcher):
+    hit = _PERSONS.get(text)
+    tracing.cache('presenter_persons', hit is not None)
+    if hit is None:
+        if _GAZETTEER[0] is not None:
+            return _GAZETTEER[0].names(removePunctuation(text))
+        hit = _PERSONS[text] = get_person(nlp(removePunctuation(text)), matcher)
+        tracing.count('nlp.docs')
+    return hit
+
 def get_person(doc, matcher):
     names = set()
     for ent in doc.ents:
@@ -247,98 +249,110 @@ def get_person(doc, matcher):
 
 
 
-def get_presenters(award, data, nlp=None, matcher=None):
-    if data.shape[0] == 0:
-        return "NA"
-    if nlp is None:
-        nlp = spacy.load("en_core_web_sm")
-    if matcher is None:
-        matcher = _build_matcher(nlp)
+def _names_after(df, award, nlp, matcher):
+    with tracing.span('nlp', items_in=df.shape[0]):
+        df['full names'] = df['text'].apply(lambda x: _persons(x, nlp, matcher))
+    df = df[df['full names'].str.len() != 0]
+    if df.shape[0] == 0:
+        return []
 
-    keys = get_keywords_of_award(award).split()
-    df = get_tweets(keys, data)
+    df['filtered'] = df['full names'].apply(filter_names)
+    df = df[df['filtered'].str.len() != 0]
     if df.shape[0] == 0:
-        return "NA"
+        return []
 
-    verb_triggers = [
-        'introduc', 'introduce', 'introduced', 'introducing',
-        'giv', 'give', 'gives', 'gave', 'giving', 'hand', 'hands', 'handed',
-        'present', 'presents', 'presented', 'presenting', 'presenter',
-        'read', 'reads', 'reading',
-        'announc', 'announce', 'announces', 'announced', 'announcing',
-        'presented by', 'announced by', 'introduced by', 'on stage with', 'joined by'
-    ]
+    df['verb_index'] = df['text'].apply(get_index)
+    df = get_positions(df, award == 'cecil b. demille award')
+    if df.shape[0] == 0:
+        return []
+
+    if award == 'cecil b. demille award':
+        df = df[~df['text'].str.contains("speech", case=False, na=False)]
+        if df.shape[0] == 0:
+            return []
 
+    with tracing.span('names_after_verb', items_in=df.shape[0]) as sp:
+        names_after = get_names_after_verb(df)
+        sp.set(items_out=len(names_after))
+    return names_after
 
 
+def get_presenters(award, data, nlp=None, matcher=None, routed=None):
+    with tracing.span('category', module='presenters', category=award):
+        return _get_presenters(award, data, nlp, matcher, routed)
 
-    df = get_tweets_with_verb(verb_triggers, df)
-    if df.shape[0] == 0:
+def _get_presenters(award, data, nlp, matcher, routed):
+    if data.shape[0] == 0:
         return "NA"
+    if nlp is None:
+        nlp = spacy.load("en_core_web_sm")
+    if matcher is None:
+        matcher = _build_matcher(nlp)
 
-    df = df.drop_duplicates(subset='text')
-    df['full names'] = df['text'].apply(lambda x: get_person(nlp(removePunctuation(x)), matcher))
-    df = df[df['full names'].str.len() != 0]
+    keys = get_plan(award).presenter_keywords
+    with tracing.span('filter', items_in=data.shape[0]) as sp:
+        df = get_tweets(keys, data) if routed is None else pd.DataFrame(routed, columns=['text'])
+        sp.set(items_out=df.shape[0])
     if df.shape[0] == 0:
         return "NA"
 
-    df['filtered'] = df['full names'].apply(filter_names)
-    df = df[df['filtered'].str.len() != 0]
+    with tracing.span('filter_verb', items_in=df.shape[0]) as sp:
+        df = get_tweets_with_verb(PRESENTER_VERBS, df)
+        sp.set(items_out=df.shape[0])
     if df.shape[0] == 0:
         return "NA"
 
-    df['verb_index'] = df['text'].apply(get_index)
-    df = get_positions(df, award == 'cecil b. demille award')
-    if df.shape[0] == 0:
+    df = df.drop_duplicates(subset='text')
+    names_after = adaptive.settle(
+        list(range(df.shape[0])), award,
+        lambda rows: _names_after(df.iloc[rows].copy(), award, nlp, matcher), cap=2, counts=Counter)
+    if not names_after:
         return "NA"
 
-    if award == 'cecil b. demille award':
-        df = df[~df['text'].str.contains("speech", case=False, na=False)]
-        if df.shape[0] == 0:
+    with tracing.span('count', items_in=len(names_after)):
+        presenters = compute_mode(names_after, k=2)
+        if not presenters:
             return "NA"
+        return ', '.join(remove_similar_names(presenters)).lower()
 
-    names_after = get_names_after_verb(df)
-    if not names_after:
-        return "NA"
-
-    presenters = compute_mode(names_after, k=2)
-    if not presenters:
-        return "NA"
-    return ', '.join(remove_similar_names(presenters)).lower()
 
 
 
+def run_presenters(year, mode=None):
+    """mode="cooccur" reads presenters off the shared co-occurrence matrix (see cooccur)."""
+    with tracing.span('presenters', year=str(year)):
+        if mode == 'cooccur':
+            import cooccur
+            return cooccur.presenters(year)
+        return _run_presenters(year)
 
-def run_presenters(year):
+def _run_presenters(year):
     data = get_tweet_data(year)
-    AWARDS_NAME = [
-        'cecil b. demille award', 'best motion picture - drama',
-        'best performance by an actress in a motion picture - drama',
-        'best performance by an actor in a motion picture - drama',
-        'best motion picture - comedy or musical',
-        'best performance by an actress in a motion picture - comedy or musical',
-        'best performance by an actor in a motion picture - comedy or musical',
-        'best animated feature film', 'best foreign language film',
-        'best performance by an actress in a supporting role in a motion picture',
-        'best performance by an actor in a supporting role in a motion picture',
-        'best director - motion picture', 'best screenplay - motion picture',
-        'best original score - motion picture', 'best original song - motion picture',
-        'best television series - drama',
-        'best performance by an actress in a television series - drama',
-        'best performance by an actor in a television series - drama',
-        'best television series - comedy or musical',
-        'best performance by an actress in a television series - comedy or musical',
-        'best performance by an actor in a television series - comedy or musical',
-        'best mini-series or motion picture made for television',
-        'best performance by an actress in a mini-series or motion picture made for television',
-        'best performance by an actor in a mini-series or motion picture made for television',
-        'best performance by an actress in a supporting role in a series, mini-series or motion picture made for television',
-        'best performance by an actor in a supporting role in a series, mini-series or motion picture made for television'
-    ]
-    categories = AWARDS_NAME if year in [2013, '2013'] else AWARDS_NAME
+    categories = AWARD_NAMES if year in [2013, '2013'] else AWARD_NAMES
+    build_plans(categories)
     nlp = spacy.load("en_core_web_sm")
     matcher = _build_matcher(nlp)
+    bundle = artifacts.load(year)
+    if bundle is not None and bundle.model_ok(nlp):
+        for t, names in bundle.persons.items():
+            _PERSONS.setdefault(t, names)
+    gz = None
+    if gazetteer.ENABLED:
+        texts = get_tweets_with_verb(PRESENTER_VERBS, data)['text'].tolist()
+        gz = gazetteer.for_presenters([texts], nlp, lambda t: _persons(t, nlp, matcher))
     out = {}
-    for award in categories:
-        out[award] = get_presenters(award, data, nlp=nlp, matcher=matcher)
+    # the gazetteer stands in for spaCy during this run only
+    _GAZETTEER[0] = gz
+    try:
+        for award in categories:
+            routed = bundle.routed('presenters', award) if bundle is not None else None
+            out[award] = get_presenters(award, data, nlp=nlp, matcher=matcher, routed=routed)
+    finally:
+        _GAZETTEER[0] = None
     return out
+
+if __name__ == '__main__':
+    import sys
+    args = memprof.cli(sys.argv[1:])
+    for award, names in run_presenters(args[0] if args else '2013').items():
+        print(f"{award}: {names}")
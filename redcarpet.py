@@ -1,8 +1,14 @@
 import re
-import json
 import sys
 import spacy
 
+import langfilter
+import memprof
+import prefilter
+import tracing
+import tweet_store
+import vocab
+
 
 
 
@@ -60,35 +66,37 @@ def _top_n(seq, key, n=5, reverse=True):
     return head, (seq[0][1], seq[0][2]) if seq else (0, 0)
 
 def run_redcarpet(year):
+    with tracing.span("redcarpet", year=str(year)):
+        _run_redcarpet(year)
+
+def _run_redcarpet(year):
     nlp = spacy.load("en_core_web_sm")
-    with open(f"gg{year}.json", encoding="utf-8") as f:
-        data = json.load(f)
+    store = langfilter.select(prefilter.select(tweet_store.load(year), prefilter.REDCARPET))
 
     bt, wt = [], []
-    for it in data:
-        t = _strip_handles(it.get("text", "").lower())
-        if not t:
-            continue
-        has_best = "best dressed" in t
-        has_worst = "worst dressed" in t
-        if has_best and has_worst:
-            continue
-        if has_best:
-            bt.append(_denoise(t))
-        elif has_worst:
-            wt.append(_denoise(t))
-
-    tally = {}
-    for tw in wt:
-        for name in _person_pairs(nlp(tw)):
-            if name not in tally:
-                tally[name] = [0, 0]
-            tally[name][1] += 1
-    for tw in bt:
-        for name in _person_pairs(nlp(tw)):
-            if name not in tally:
-                tally[name] = [0, 0]
-            tally[name][0] += 1
+    with tracing.span("filter", items_in=len(store)) as sp:
+        for t in store.map_texts(lambda x: _strip_handles(x.lower())):
+            if not t:
+                continue
+            has_best = "best dressed" in t
+            has_worst = "worst dressed" in t
+            if has_best and has_worst:
+                continue
+            if has_best:
+                bt.append(_denoise(t))
+            elif has_worst:
+                wt.append(_denoise(t))
+        sp.set(items_out=len(bt) + len(wt))
+
+    names = vocab.Vocabulary()
+    with tracing.span("nlp", items_in=len(bt) + len(wt)):
+        worst_ids = names.encode(name for tw in wt for name in _person_pairs(nlp(tw)))
+        best_ids = names.encode(name for tw in bt for name in _person_pairs(nlp(tw)))
+        tracing.count("nlp.docs", len(bt) + len(wt))
+    with tracing.span("count", items_in=len(names)):
+        best = vocab.count(best_ids, len(names)).tolist()
+        worst = vocab.count(worst_ids, len(names)).tolist()
+        tally = {name: (best[i], worst[i]) for i, name in enumerate(names.strings)}
 
     table = _score_list(tally)
 
@@ -125,4 +133,5 @@ def run_redcarpet(year):
     print("")
 
 if __name__ == "__main__":
-    run_redcarpet(sys.argv[1] if len(sys.argv) > 1 else "2013")
+    args = memprof.cli(sys.argv[1:])
+    run_redcarpet(args[0] if args else "2013")
@@ -1,60 +1,175 @@
 from textblob import TextBlob 
-import json
+import argparse
+import os
+import random
 import sys
 import time
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
 import numpy as np
 
-def run_sentiment(year):
-	with open('gg' + str(year) + '.json') as jsonfile:
-		data = json.load(jsonfile)
-	tweets = data
+import memprof
+import tracing
+import tweet_store
+
+def _polarity(text):
+	blob = TextBlob(text.lower())
+	sentences = blob.sentences
+	return sentences[0].sentiment.polarity if sentences else 0.0
+
+def _score_chunk(texts):
+	return [_polarity(t) for t in texts]
+
+def _stratified_indices(n, sample, strata, seed):
+	# The corpus is in posting order, so equal-size index blocks are time strata.
+	# Each block gets a share of the sample proportional to its size.
+	bounds = np.linspace(0, n, strata + 1).astype(int)
+	rng = random.Random(seed)
+	picked = []
+	for h in range(strata):
+		lo, hi = bounds[h], bounds[h + 1]
+		if hi <= lo:
+			continue
+		take = min(hi - lo, max(1, round(sample * (hi - lo) / n)))
+		picked.append((h, sorted(rng.sample(range(lo, hi), take))))
+	return bounds, picked
+
+def _score_all(texts, workers):
+	if workers <= 1 or len(texts) < 2000:
+		return _score_chunk(texts)
+	size = max(500, len(texts) // (workers * 8))
+	chunks = [texts[i:i + size] for i in range(0, len(texts), size)]
+	out = []
+	with ProcessPoolExecutor(max_workers=workers) as pool:
+		for part in pool.map(_score_chunk, chunks):
+			out.extend(part)
+	return out
+
+def _stratified_estimate(groups, sizes, z):
+	# groups: per-stratum list of values; sizes: stratum population sizes
+	total = float(sum(sizes))
+	est = var = 0.0
+	for vals, N in zip(groups, sizes):
+		n = len(vals)
+		if n == 0:
+			continue
+		w = N / total
+		mean = sum(vals) / n
+		est += w * mean
+		if n > 1:
+			s2 = sum((v - mean) ** 2 for v in vals) / (n - 1)
+			var += w * w * (1 - n / N) * s2 / n
+	half = z * var ** 0.5
+	return est, est - half, est + half
+
+def run_sentiment(year, sample=50000, workers=None, strata=20, seed=0, confidence=0.95):
+	"""Overall sentiment of the night. sample=None scores every tweet; otherwise a
+	stratified random sample of about that many tweets, with confidence intervals."""
+	with tracing.span('sentiment', year=str(year)):
+		return _run_sentiment(year, sample, workers, strata, seed, confidence)
+
+def _run_sentiment(year, sample, workers, strata, seed, confidence):
+	tweets = tweet_store.load(year)
+	n = len(tweets)
+	if sample is None or sample >= n:
+		sample = n
+	strata = max(1, min(strata, sample))
+	workers = workers or os.cpu_count() or 1
+	starttime = time.time()
+
+	bounds, picked = _stratified_indices(n, sample, strata, seed)
+	flat = [i for _, idx in picked for i in idx]
+	with tracing.span('score', items_in=len(flat)):
+		scores = _score_all([tweets.text(i) for i in flat], workers)
+
 	positive = [0,0]
 	very_pos = 0
 	negative = [0,0]
 	very_neg = 0
-	counter = 0
-	starttime = time.time()
-	num_samples = input("Number of evenly-spaced samples (50000 takes ~20 seconds to run, input ALL to run on everything): ")
-	if num_samples == 'ALL':
-		indices = np.linspace(0,len(tweets) - 1,len(tweets))
-	else:
-		indices = np.linspace(0,len(tweets) - 1,int(num_samples))
-
-	for i in indices:
-		index = int(i)
-		tweet = tweets[index]
-		text = tweet['text'].lower()
-		blob = TextBlob(text)
-		sentiment = blob.sentences[0].sentiment.polarity
-		if sentiment > 0:
-			positive[0] += 1
-			positive[1] += sentiment
-			if sentiment >= 0.5:
-				very_pos += 1
-		elif sentiment < 0:
-			negative[0] += 1
-			negative[1] += sentiment
-			if sentiment <= -0.5:
-				very_neg += 1
+	pos_groups, neg_groups, pol_groups, sizes = [], [], [], []
+	k = 0
+	for h, idx in picked:
+		vals = scores[k:k + len(idx)]
+		k += len(idx)
+		sizes.append(bounds[h + 1] - bounds[h])
+		pol_groups.append(vals)
+		pos_groups.append([1.0 if v > 0 else 0.0 for v in vals])
+		neg_groups.append([1.0 if v < 0 else 0.0 for v in vals])
+		for sentiment in vals:
+			if sentiment > 0:
+				positive[0] += 1
+				positive[1] += sentiment
+				if sentiment >= 0.5:
+					very_pos += 1
+			elif sentiment < 0:
+				negative[0] += 1
+				negative[1] += sentiment
+				if sentiment <= -0.5:
+					very_neg += 1
+
+	z = NormalDist().inv_cdf(0.5 + confidence / 2)
+	share_pos = _stratified_estimate(pos_groups, sizes, z)
+	share_neg = _stratified_estimate(neg_groups, sizes, z)
+	mean_pol = _stratified_estimate(pol_groups, sizes, z)
 
 	possible_sentiments = ['ABSOLUTELY HORRENDOUS','VERY POOR','POOR','ALRIGHT','EXPECTED','DECENT','GOOD','VERY GOOD','GREAT','INCREDIBLE','ASTRONOMICALLY BEAUTIFULLY WONDERFUL']
+	print("Scored " + str(len(flat)) + " of " + str(n) + " tweets in " + str(round(time.time() - starttime, 1)) + " seconds on " + str(workers) + " worker(s)")
+	print('')
 	print("ANALYSIS OF POSITIVITY")
 	print("Total number of positive sentiments: " + str(positive[0]))
 	print("Number of highly positive sentiments: " + str(very_pos))
 	print("Positivity score: " + str(positive[1]))
-	print("The average positivity of all positive tweets was " + str(positive[1]/positive[0]))
-	print("The percentage of positive tweets that were VERY positive was " + str(very_pos/positive[0] * 100) + "%")
+	if positive[0]:
+		print("The average positivity of all positive tweets was " + str(positive[1]/positive[0]))
+		print("The percentage of positive tweets that were VERY positive was " + str(very_pos/positive[0] * 100) + "%")
 	print('')
 	print("ANALYSIS OF NEGATIVITY")
 	print("Total number of negative sentiments: " + str(negative[0]))
 	print("Number of highly negative sentiments: " + str(very_neg))
 	print("Negativity score: " + str(negative[1]))
-	print("The average negativity of all negative tweets was " + str(negative[1]/negative[0]))
-	print("The percentage of negative tweets that were VERY negative was " + str(very_neg/negative[0] * 100) + "%")
+	if negative[0]:
+		print("The average negativity of all negative tweets was " + str(negative[1]/negative[0]))
+		print("The percentage of negative tweets that were VERY negative was " + str(very_neg/negative[0] * 100) + "%")
+	print('')
+	pct = str(round(confidence * 100)) + "%"
+	print("ESTIMATES FOR ALL TWEETS (" + pct + " confidence)")
+	print("Share of positive tweets: %.4f [%.4f, %.4f]" % share_pos)
+	print("Share of negative tweets: %.4f [%.4f, %.4f]" % share_neg)
+	print("Mean polarity: %.4f [%.4f, %.4f]" % mean_pol)
 	print('')
-	index = int(positive[0]/(positive[0] + negative[0])*10)
-	decided_total_sentiment = possible_sentiments[index]
-	print("As a whole, the " + year + " Golden Globes were " + decided_total_sentiment)
+	decided_total_sentiment = 'EXPECTED'
+	if positive[0] + negative[0]:
+		index = int(positive[0]/(positive[0] + negative[0])*10)
+		decided_total_sentiment = possible_sentiments[index]
+	print("As a whole, the " + str(year) + " Golden Globes were " + decided_total_sentiment)
+
+	return {
+		'year': str(year),
+		'scored': len(flat),
+		'total': n,
+		'positive_share': share_pos,
+		'negative_share': share_neg,
+		'mean_polarity': mean_pol,
+		'verdict': decided_total_sentiment,
+	}
+
+def _parse_args(argv):
+	parser = argparse.ArgumentParser(description="Overall sentiment of a Golden Globes night.")
+	parser.add_argument('year')
+	group = parser.add_mutually_exclusive_group()
+	group.add_argument('--sample', type=int, default=50000, help="number of tweets to score (stratified by time)")
+	group.add_argument('--all', action='store_true', help="score every tweet")
+	parser.add_argument('--workers', type=int, default=None, help="scoring processes (default: all cores)")
+	parser.add_argument('--strata', type=int, default=20)
+	parser.add_argument('--seed', type=int, default=0)
+	parser.add_argument('--confidence', type=float, default=0.95)
+	parser.add_argument('--profile-memory', nargs='?', const=memprof.DEFAULT_PATH, default=None, metavar='PATH',
+		help="attribute memory to stages and write a report (default gg_memprof.json)")
+	return parser.parse_args(argv)
 
 if __name__ == "__main__":
-	result = run_sentiment(sys.argv[1])
\ No newline at end of file
+	args = _parse_args(sys.argv[1:])
+	if args.profile_memory:
+		memprof.enable(args.profile_memory)
+	result = run_sentiment(args.year, sample=None if args.all else args.sample, workers=args.workers,
+		strata=args.strata, seed=args.seed, confidence=args.confidence)
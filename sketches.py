@@ -0,0 +1,204 @@
+import hashlib
+import heapq
+import math
+import os
+import random
+
+import numpy as np
+
+# Bounded-memory counting for streaming-sized corpora. Off by default; with
+# GG_SKETCH=<capacity> (or gg_api.py --sketch [capacity]) the counting stages
+# that otherwise keep one entry per distinct string (hosts' name counts, the
+# awards span pool, parties' label -> tweet lists) keep at most `capacity`
+# entries instead:
+#   SpaceSaving  top-k counter; every string seen more than N / capacity times
+#                is monitored, and a count overestimates by at most its error
+#   CountMin     fixed-size table, estimate <= true + (e / width) * N with
+#                probability 1 - exp(-depth)
+#   HeavyHitters both together; a count is the smaller of the two estimates
+#   Reservoir    uniform sample of k items from a stream of unknown length
+
+DEFAULT_CAPACITY = 4096
+CM_WIDTH = 1 << 14
+CM_DEPTH = 4
+SEED = 1234
+
+_PRIME = (1 << 61) - 1
+_RNG = random.Random(SEED)
+
+
+def _capacity_from_env():
+    v = os.environ.get('GG_SKETCH', '')
+    if not v:
+        return None
+    return DEFAULT_CAPACITY if v == '1' else int(v)
+
+
+CAPACITY = _capacity_from_env()
+
+
+def enabled():
+    return CAPACITY is not None
+
+
+def enable(capacity=None):
+    global CAPACITY
+    CAPACITY = int(capacity) if capacity else (CAPACITY or DEFAULT_CAPACITY)
+
+
+class SpaceSaving:
+    __slots__ = ('capacity', 'counts', 'errors', 'total', '_heap')
+
+    def __init__(self, capacity):
+        self.capacity = max(1, int(capacity))
+        self.counts = {}
+        self.errors = {}
+        self.total = 0
+        self._heap = []     # (count, item); stale entries are skipped on pop
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __contains__(self, item):
+        return item in self.counts
+
+    def add(self, item, n=1):
+        """Count `item`; returns the item evicted to make room for it, if any."""
+        self.total += n
+        counts = self.counts
+        c = counts.get(item)
+        if c is not None:
+            counts[item] = c + n
+            heapq.heappush(self._heap, (c + n, item))
+            self._compact()
+            return None
+        evicted = None
+        floor = 0
+        if len(counts) >= self.capacity:
+            evicted, floor = self._pop_min()
+            del counts[evicted]
+            del self.errors[evicted]
+        counts[item] = floor + n
+        self.errors[item] = floor
+        heapq.heappush(self._heap, (floor + n, item))
+        return evicted
+
+    def _pop_min(self):
+        heap, counts = self._heap, self.counts
+        while True:
+            c, item = heapq.heappop(heap)
+            if counts.get(item) == c:
+                return item, c
+
+    def _compact(self):
+        if len(self._heap) > 4 * self.capacity + 64:
+            self._heap = [(c, s) for s, c in self.counts.items()]
+            heapq.heapify(self._heap)
+
+    def error_bound(self):
+        """No count is off by more than this."""
+        return self.total / self.capacity
+
+    def most_common(self, k=None):
+        """[(item, count)] by count, ties in first-monitored order."""
+        items = sorted(self.counts.items(), key=lambda kv: -kv[1])
+        return items if k is None else items[:k]
+
+
+def _stable_hash(item):
+    """64-bit hash that, unlike hash(), is the same in every process (str hashing is salted)."""
+    data = item if isinstance(item, bytes) else (item if isinstance(item, str) else repr(item)).encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+class CountMin:
+    __slots__ = ('width', 'depth', 'table', 'total', '_a', '_b')
+
+    def __init__(self, width=CM_WIDTH, depth=CM_DEPTH, seed=SEED):
+        rng = random.Random(seed)
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.total = 0
+        self._a = [rng.randrange(1, _PRIME) for _ in range(depth)]
+        self._b = [rng.randrange(0, _PRIME) for _ in range(depth)]
+
+    def _cells(self, item):
+        h = _stable_hash(item)
+        w = self.width
+        return [((a * h + b) % _PRIME) % w for a, b in zip(self._a, self._b)]
+
+    def add(self, item, n=1):
+        self.total += n
+        t = self.table
+        for row, col in enumerate(self._cells(item)):
+            t[row, col] += n
+
+    def estimate(self, item):
+        t = self.table
+        return int(min(t[row, col] for row, col in enumerate(self._cells(item))))
+
+    def error_bound(self):
+        return math.e / self.width * self.total
+
+
+class HeavyHitters:
+    """SpaceSaving for which strings to keep, CountMin to tighten their counts."""
+
+    __slots__ = ('ss', 'cm')
+
+    def __init__(self, capacity=None, width=CM_WIDTH, depth=CM_DEPTH):
+        self.ss = SpaceSaving(capacity or CAPACITY or DEFAULT_CAPACITY)
+        self.cm = CountMin(width, depth)
+
+    def __len__(self):
+        return len(self.ss)
+
+    def add(self, item, n=1):
+        self.cm.add(item, n)
+        return self.ss.add(item, n)
+
+    def update(self, items):
+        for s in items:
+            self.add(s)
+
+    def count(self, item):
+        c = self.ss.counts.get(item)
+        est = self.cm.estimate(item)
+        return est if c is None else min(c, est)
+
+    def error_bound(self):
+        return min(self.ss.error_bound(), self.cm.error_bound())
+
+    def most_common(self, k=None):
+        est = self.cm.estimate
+        items = [(s, min(c, est(s))) for s, c in self.ss.counts.items()]
+        items.sort(key=lambda kv: -kv[1])
+        return items if k is None else items[:k]
+
+    def to_dict(self):
+        """{string: count} for the monitored strings, in first-monitored order."""
+        est = self.cm.estimate
+        return {s: min(c, est(s)) for s, c in self.ss.counts.items()}
+
+
+class Reservoir:
+    __slots__ = ('k', 'seen', 'items', '_rng')
+
+    def __init__(self, k, rng=None):
+        self.k = k
+        self.seen = 0
+        self.items = []
+        self._rng = rng or _RNG
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, x):
+        self.seen += 1
+        if len(self.items) < self.k:
+            self.items.append(x)
+            return
+        j = self._rng.randrange(self.seen)
+        if j < self.k:
+            self.items[j] = x
@@ -0,0 +1,112 @@
+import re
+from contextlib import contextmanager
+
+import numpy as np
+from spacy.matcher import Matcher
+
+import tracing
+import vocab
+
+# Corpus-wide spaCy annotation shared by winners and nominees. Each distinct
+# tweet text is parsed once (batched through nlp.pipe) and only the bits the
+# modules need are kept, so a tweet that shows up under many categories, or in
+# both modules, never hits the tagger twice.
+
+_WORD = re.compile(r"[A-Za-z]+(?:'[A-Za-z]+)?$")
+_CACHE = {}
+_MATCHER = [None, None]
+_VOCAB = vocab.Vocabulary()
+_GUESS = [None]
+
+
+class Annotation:
+    __slots__ = ("propn", "persons", "titles", "names")
+
+    def __init__(self, propn, persons, titles, names):
+        self.propn = propn
+        self.persons = persons
+        self.titles = titles
+        self.names = names
+
+
+def _matcher(nlp):
+    if _MATCHER[0] is not nlp:
+        m = Matcher(nlp.vocab)
+        pat = [{"POS": "PROPN"}, {"POS": "PROPN", "OP": "?"}]
+        try:
+            m.add("FULL_NAME", [pat])
+        except TypeError:
+            m.add("FULL_NAME", None, pat)
+        _MATCHER[0], _MATCHER[1] = nlp, m
+    return _MATCHER[1]
+
+
+def _annotate_doc(doc, matcher):
+    propn = _VOCAB.encode(t.text.lower() for t in doc if t.tag_ in ("NNP", "NNPS") and _WORD.match(t.text))
+    persons = tuple(e.text for e in doc.ents if e.label_ == "PERSON")
+    titles = tuple(e.text for e in doc.ents if e.label_ in {"WORK_OF_ART", "ORG"})
+    names = tuple(doc[s:e].text for _, s, e in matcher(doc))
+    return Annotation(propn, persons, titles, names)
+
+
+def annotate(tweets, nlp, batch_size=256):
+    """One Annotation per tweet; only texts not seen before go through nlp.pipe."""
+    distinct = dict.fromkeys(tweets)
+    todo = [t for t in distinct if t not in _CACHE]
+    tracing.count("tagging.hit", len(distinct) - len(todo))
+    if todo and _GUESS[0] is not None:
+        tracing.count("tagging.guessed", len(todo))
+        guess = _GUESS[0]
+        return [_CACHE[t] if t in _CACHE else guess(t) for t in tweets]
+    tracing.count("tagging.miss", len(todo))
+    if todo:
+        with tracing.span("nlp", items_in=len(todo)):
+            matcher = _matcher(nlp)
+            for t, doc in zip(todo, nlp.pipe(todo, batch_size=batch_size)):
+                _CACHE[t] = _annotate_doc(doc, matcher)
+            tracing.count("nlp.docs", len(todo))
+    return [_CACHE[t] for t in tweets]
+
+
+def nnp_counts(tweets, nlp):
+    """{token: count} of NNP/NNPS tokens, in first-seen order."""
+    anns = annotate(tweets, nlp)
+    if not anns:
+        return {}
+    ids, cnt = vocab.first_seen_counts(np.concatenate([a.propn for a in anns]))
+    return dict(zip(_VOCAB.decode(ids), cnt.tolist()))
+
+
+@contextmanager
+def guessing(fn):
+    """While the block runs, texts not parsed yet get fn(text) instead of spaCy (see gazetteer); fn may be None."""
+    _GUESS[0] = fn
+    try:
+        yield
+    finally:
+        _GUESS[0] = None
+
+
+def make(propn, persons, titles, names):
+    return Annotation(_VOCAB.encode(propn), persons, titles, names)
+
+
+def tokens(ids):
+    return _VOCAB.decode(ids)
+
+
+def clear():
+    _CACHE.clear()
+
+
+def export():
+    """(vocabulary strings, {text: Annotation}) for persisting the cache."""
+    return list(_VOCAB.strings), dict(_CACHE)
+
+
+def preload(strings, cache):
+    """Merge an exported cache; token ids are remapped onto this process's vocabulary."""
+    remap = _VOCAB.encode(strings)
+    for t, a in cache.items():
+        if t not in _CACHE:
+            _CACHE[t] = Annotation(remap[a.propn] if len(a.propn) else a.propn, a.persons, a.titles, a.names)
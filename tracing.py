@@ -0,0 +1,181 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+# Lightweight per-stage tracing. Stages open spans (load, clean, filter, nlp,
+# count, merge, write) and bump counters (nlp calls, cache hits/misses, fuzzy
+# comparisons); counters are charged to the innermost open span and rolled up
+# into its parents, so a module span carries its totals and a category span
+# carries just that category's. Stages are summarised per top-level span
+# (module), e.g. 'presenters.nlp'. Off by default: span() hands back a shared
+# no-op and count() returns immediately. Enable with GG_TRACE=<path> or
+# gg_api.py --trace [path]; export() writes a Chrome trace (chrome://tracing,
+# Perfetto) whose otherData holds the counter totals and a per-stage summary.
+# Hooks (see memprof) piggyback on the same spans.
+
+DEFAULT_PATH = 'gg_trace.json'
+
+_ENABLED = False
+_PATH = None
+_EVENTS = []
+_COUNTERS = defaultdict(int)
+_LOCAL = threading.local()
+_HOOKS = []
+_T0 = time.perf_counter_ns()
+
+
+class Span:
+    __slots__ = ('name', 'args', 'counters', 'start', 'parent', 'root')
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.counters = defaultdict(int)
+        self.start = 0
+        self.parent = None
+        self.root = name
+
+    def set(self, **kv):
+        """Attach attributes, e.g. items_in/items_out."""
+        self.args.update(kv)
+
+    def __enter__(self):
+        stack = _stack()
+        self.parent = stack[-1] if stack else None
+        if self.parent is not None:
+            self.root = self.parent.root
+        stack.append(self)
+        for h in _HOOKS:
+            h.enter(self)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        for h in reversed(_HOOKS):
+            h.exit(self)
+        _stack().pop()
+        if self.parent is not None:
+            for k, v in self.counters.items():
+                self.parent.counters[k] += v
+        if not _ENABLED:
+            return False
+        args = dict(self.args)
+        if self.counters:
+            args['counters'] = dict(self.counters)
+        _EVENTS.append({
+            'name': self.name, 'cat': self.root, 'ph': 'X', 'pid': os.getpid(), 'tid': threading.get_ident(),
+            'ts': (self.start - _T0) / 1000.0, 'dur': (end - self.start) / 1000.0, 'args': args,
+        })
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set(self, **kv):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullSpan()
+
+
+def _stack():
+    s = getattr(_LOCAL, 'stack', None)
+    if s is None:
+        s = _LOCAL.stack = []
+    return s
+
+
+def enabled():
+    return _ENABLED
+
+
+def enable(path=None):
+    """Turn tracing on; the trace is written to path (default gg_trace.json) at exit."""
+    global _ENABLED, _PATH
+    if not _ENABLED:
+        atexit.register(_flush)
+    _ENABLED = True
+    _PATH = path or _PATH or DEFAULT_PATH
+
+
+def add_hook(hook):
+    """hook.enter(span)/hook.exit(span) run around every span, even with tracing off."""
+    if hook not in _HOOKS:
+        _HOOKS.append(hook)
+
+
+def span(name, **args):
+    return Span(name, args) if _ENABLED or _HOOKS else _NULL
+
+
+def count(name, n=1):
+    if not _ENABLED:
+        return
+    _COUNTERS[name] += n
+    stack = _stack()
+    if stack:
+        stack[-1].counters[name] += n
+
+
+def cache(name, hit):
+    """Record a lookup in cache `name`; hit rates come out in summary()."""
+    count(f'{name}.hit' if hit else f'{name}.miss')
+
+
+def summary():
+    stages = {}
+    for ev in _EVENTS:
+        key = ev['name'] if ev['cat'] == ev['name'] else f"{ev['cat']}.{ev['name']}"
+        s = stages.setdefault(key, {'calls': 0, 'total_ms': 0.0, 'items_in': 0, 'items_out': 0})
+        s['calls'] += 1
+        s['total_ms'] += ev['dur'] / 1000.0
+        for k in ('items_in', 'items_out'):
+            if isinstance(ev['args'].get(k), int):
+                s[k] += ev['args'][k]
+    for s in stages.values():
+        s['total_ms'] = round(s['total_ms'], 3)
+    rates = {}
+    for k, hits in _COUNTERS.items():
+        if k.endswith('.hit'):
+            base = k[:-4]
+            total = hits + _COUNTERS.get(base + '.miss', 0)
+            rates[base] = round(hits / total, 4) if total else None
+    for k in _COUNTERS:
+        if k.endswith('.miss') and k[:-5] not in rates:
+            rates[k[:-5]] = 0.0
+    return {'counters': dict(_COUNTERS), 'cache_hit_rate': rates, 'stages': stages}
+
+
+def export(path=None):
+    path = path or _PATH or DEFAULT_PATH
+    doc = {'traceEvents': list(_EVENTS), 'displayTimeUnit': 'ms', 'otherData': summary()}
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(doc, f, ensure_ascii=False)
+    os.replace(tmp, path)
+    return path
+
+
+def reset():
+    _EVENTS.clear()
+    _COUNTERS.clear()
+
+
+def _flush():
+    if _ENABLED and _EVENTS:
+        print(f'Wrote trace to {export()}')
+
+
+if os.environ.get('GG_TRACE'):
+    enable(None if os.environ['GG_TRACE'] == '1' else os.environ['GG_TRACE'])
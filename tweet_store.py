@@ -0,0 +1,219 @@
+import json
+import os
+from array import array
+
+import numpy as np
+
+import corpus
+import tracing
+
+# One compact, shared copy of a year's tweets. Distinct texts are interned into
+# a single UTF-8 buffer addressed by an offsets array; per-tweet text ids, tweet
+# ids and timestamps are NumPy arrays. Modules read through TextView, which
+# decodes on access instead of holding its own list of strings. A store can
+# also carry `derived`: per-distinct-text results of named cleaners compiled
+# ahead of time (see artifacts), which map_texts returns instead of recomputing.
+
+_STORES = {}
+
+
+class TextView:
+    """Read-only sequence of tweet texts backed by a TweetStore buffer."""
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store, index):
+        self._store = store
+        self._index = index
+
+    def __len__(self):
+        return len(self._index)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return TextView(self._store, self._index[i])
+        return self._store.unique_text(int(self._index[i]))
+
+    def __iter__(self):
+        text = self._store.unique_text
+        for j in self._index.tolist():
+            yield text(j)
+
+
+_ARRAYS = ("buffer", "offsets", "text_ids", "ids", "timestamps")
+
+
+def fn_key(fn):
+    """Stable name for a module-level function; None for lambdas and closures."""
+    qual = getattr(fn, "__qualname__", "")
+    mod = getattr(fn, "__module__", None)
+    if not qual or "<" in qual or mod in (None, "__main__"):
+        return None
+    return f"{mod}.{qual}"
+
+
+class TweetStore:
+    __slots__ = _ARRAYS + ("derived",)
+
+    def __init__(self, buffer, offsets, text_ids, ids, timestamps, derived=None):
+        self.buffer = buffer
+        self.offsets = offsets
+        self.text_ids = text_ids
+        self.ids = ids
+        self.timestamps = timestamps
+        self.derived = derived if derived is not None else {}
+
+    def __len__(self):
+        return len(self.text_ids)
+
+    @property
+    def n_unique(self):
+        return len(self.offsets) - 1
+
+    def unique_text(self, j):
+        return str(self.buffer[self.offsets[j]:self.offsets[j + 1]], "utf-8")
+
+    def text(self, i):
+        return self.unique_text(int(self.text_ids[i]))
+
+    @property
+    def texts(self):
+        """Every tweet's text, in file order (retweets repeat)."""
+        return TextView(self, self.text_ids)
+
+    @property
+    def unique_texts(self):
+        """Each distinct text once, indexed by text id."""
+        return TextView(self, np.arange(self.n_unique))
+
+    def map_texts(self, fn):
+        """fn applied once per distinct text, expanded to one (shared) result per tweet."""
+        with tracing.span("map_texts", fn=getattr(fn, "__name__", "?"), items_in=len(self)) as sp:
+            done = self.derived.get(fn_key(fn))
+            tracing.cache("derived", done is not None)
+            if done is None:
+                done = [fn(t) for t in self.unique_texts]
+                tracing.count("map_texts.calls", len(done))
+            sp.set(items_out=len(done))
+            tracing.count("map_texts.saved", len(self) - len(done))
+            return [done[j] for j in self.text_ids.tolist()]
+
+    def unique_results(self, fn):
+        """fn over each distinct text (precompiled results when available)."""
+        done = self.derived.get(fn_key(fn))
+        return done if done is not None else [fn(t) for t in self.unique_texts]
+
+    def subset(self, index):
+        """Tweets at `index`; shares the text buffer with this store."""
+        index = np.asarray(index)
+        return TweetStore(self.buffer, self.offsets, self.text_ids[index], self.ids[index], self.timestamps[index],
+                          self.derived)
+
+    def compact(self, keep):
+        """Tweets whose text id is flagged in `keep` (one bool per distinct text), in a buffer of just those texts."""
+        keep = np.asarray(keep, dtype=bool)
+        uniq = np.flatnonzero(keep)
+        starts = self.offsets[uniq]
+        lens = self.offsets[uniq + 1] - starts
+        offsets = np.zeros(len(uniq) + 1, dtype=np.int64)
+        np.cumsum(lens, out=offsets[1:])
+        gather = np.repeat(starts - offsets[:-1], lens) + np.arange(offsets[-1], dtype=np.int64)
+        buffer = memoryview(np.frombuffer(self.buffer, dtype=np.uint8)[gather].tobytes())
+        remap = np.cumsum(keep, dtype=np.int64) - 1
+        index = np.flatnonzero(keep[self.text_ids])
+        derived = {k: [done[j] for j in uniq.tolist()] for k, done in self.derived.items()}
+        return TweetStore(buffer, offsets, remap[self.text_ids[index]].astype(np.int32), self.ids[index],
+                          self.timestamps[index], derived)
+
+
+def iter_records(fh, chunk=1 << 20):
+    """Yield tweet dicts from a JSON array (or whitespace/newline separated objects) without loading it whole."""
+    dec = json.JSONDecoder()
+    buf = fh.read(chunk)
+    pos = 0
+    eof = not buf
+    while True:
+        while pos < len(buf) and buf[pos] in " \t\r\n,[":
+            pos += 1
+        if pos >= len(buf) or buf[pos] == "]":
+            if pos < len(buf) or eof:
+                return
+            buf, pos = fh.read(chunk), 0
+            eof = not buf
+            continue
+        try:
+            obj, end = dec.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            more = fh.read(chunk)
+            if not more:
+                raise
+            buf, pos = buf[pos:] + more, 0
+            continue
+        yield obj
+        pos = end
+        if pos > chunk:
+            buf, pos = buf[pos:], 0
+
+
+def build(records):
+    buffer = bytearray()
+    offsets = array("q", [0])
+    text_ids = array("i")
+    ids = array("q")
+    timestamps = array("q")
+    seen = {}
+    for i, rec in enumerate(records):
+        text = rec.get("text", "") or ""
+        tid = seen.get(text)
+        if tid is None:
+            tid = seen[text] = len(offsets) - 1
+            buffer += text.encode("utf-8")
+            offsets.append(len(buffer))
+        text_ids.append(tid)
+        ids.append(int(rec.get("id", i) or i))
+        timestamps.append(int(rec.get("timestamp_ms", 0) or 0))
+    return TweetStore(
+        memoryview(bytes(buffer)),
+        np.frombuffer(offsets, dtype=np.int64),
+        np.frombuffer(text_ids, dtype=np.int32),
+        np.frombuffer(ids, dtype=np.int64),
+        np.frombuffer(timestamps, dtype=np.int64),
+    )
+
+
+def save(store, dirpath):
+    """Write the store's arrays as .npy files under dirpath."""
+    os.makedirs(dirpath, exist_ok=True)
+    arrays = dict(zip(_ARRAYS, (np.frombuffer(store.buffer, dtype=np.uint8), store.offsets,
+                                store.text_ids, store.ids, store.timestamps)))
+    for name, arr in arrays.items():
+        np.save(os.path.join(dirpath, name + ".npy"), arr)
+
+
+def open_saved(dirpath, derived=None):
+    """A TweetStore over arrays written by save(), memory-mapped read-only."""
+    arrs = [np.load(os.path.join(dirpath, name + ".npy"), mmap_mode="r") for name in _ARRAYS]
+    return TweetStore(memoryview(arrs[0]), *arrs[1:], derived=derived)
+
+
+def corpus_path(year):
+    return corpus.path(year)
+
+
+def load(year):
+    """The shared TweetStore for a year, rebuilt only when the file changes."""
+    path = corpus_path(year)
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    store = _STORES.get(key)
+    tracing.cache("tweet_store", store is not None)
+    if store is None:
+        with tracing.span("load", year=str(year), bytes=st.st_size) as sp:
+            import artifacts
+            store = artifacts.saved_store(year, key)
+            if store is None:
+                with corpus.open_text(path) as fh:
+                    store = build(iter_records(fh))
+            sp.set(items_out=len(store), unique=store.n_unique)
+        _STORES.clear()
+        _STORES[key] = store
+    return store
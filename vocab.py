@@ -0,0 +1,81 @@
+import numpy as np
+
+# Dictionary encoding for the counting stages: strings become dense int ids
+# (in first-seen order, so ties still break the way Counter/dicts broke them)
+# and frequency work runs on NumPy arrays.
+
+
+class Vocabulary:
+    __slots__ = ("index", "strings")
+
+    def __init__(self, strings=()):
+        self.index = {}
+        self.strings = []
+        for s in strings:
+            self.id(s)
+
+    def __len__(self):
+        return len(self.strings)
+
+    def id(self, s):
+        i = self.index.get(s)
+        if i is None:
+            i = self.index[s] = len(self.strings)
+            self.strings.append(s)
+        return i
+
+    def get(self, s, default=-1):
+        return self.index.get(s, default)
+
+    def encode(self, seq):
+        idx = self.id
+        return np.fromiter((idx(s) for s in seq), dtype=np.int32)
+
+    def decode(self, ids):
+        strings = self.strings
+        return [strings[i] for i in np.asarray(ids).tolist()]
+
+    def to_dict(self, counts):
+        """{string: count} for the non-zero entries, in id order."""
+        nz = np.flatnonzero(counts)
+        return dict(zip(self.decode(nz), counts[nz].tolist()))
+
+
+def count(ids, size=0):
+    ids = np.asarray(ids, dtype=np.int64)
+    return np.bincount(ids, minlength=size) if ids.size else np.zeros(size, dtype=np.int64)
+
+
+def tally(items):
+    """Vocabulary and count array for an iterable of strings."""
+    v = Vocabulary()
+    ids = v.encode(items)
+    return v, count(ids, len(v))
+
+
+def first_seen_counts(ids):
+    """(unique ids, counts), ordered by where each id first occurs in `ids`."""
+    ids = np.asarray(ids, dtype=np.int64)
+    uniq, first, cnt = np.unique(ids, return_index=True, return_counts=True)
+    order = np.argsort(first, kind="stable")
+    return uniq[order], cnt[order]
+
+
+def top_k(counts, k=None):
+    """Ids of the k largest non-zero counts, ordered like Counter.most_common(k)."""
+    counts = np.asarray(counts)
+    nz = np.flatnonzero(counts)
+    if k is not None and k < nz.size:
+        vals = counts[nz]
+        kth = vals[np.argpartition(-vals, k - 1)[k - 1]]
+        above = nz[vals > kth]
+        nz = np.concatenate([above, nz[vals == kth][:k - above.size]])
+    return nz[np.lexsort((nz, -counts[nz]))]
+
+
+def above_fraction(counts, frac):
+    """Ids whose count is strictly above frac * max, in id order."""
+    counts = np.asarray(counts)
+    if not counts.size:
+        return counts.astype(np.int64)
+    return np.flatnonzero(counts > counts.max() * frac)
@@ -1,92 +1,58 @@
-import json
-import re
-from collections import Counter
-
+import numpy as np
 import spacy
-from spacy.matcher import Matcher
 from fuzzywuzzy import fuzz
-import nltk
-from nltk.corpus import stopwords
-
-
-
 
+import adaptive
+import artifacts
+import gazetteer
+import langfilter
+import memprof
+import prefilter
+import tagging
+import tracing
+import tweet_store
+import vocab
+from award_plans import AWARD_NAMES, build_plans, get_plan
 
-def _ensure_nltk():
-    try:
-        needed = [
-            ("punkt", "tokenizers/punkt"),
-            ("punkt_tab", "tokenizers/punkt_tab"),
-            ("averaged_perceptron_tagger", "taggers/averaged_perceptron_tagger"),
-            ("averaged_perceptron_tagger_eng", "taggers/averaged_perceptron_tagger_eng"),
-            ("stopwords", "corpora/stopwords"),
-        ]
-        for pkg, path in needed:
-            try:
-                nltk.data.find(path)
-            except LookupError:
-                nltk.download(pkg, quiet=True)
-    except Exception:
-        pass
 
 
-_ensure_nltk()
 
 
 
 
-def get_tweet_data(year):
-    path = f"gg{year}.json"
-    with open(path, "r", encoding="utf-8") as fh:
-        raw = json.load(fh)
-
-    texts = [t.get("text", "") for t in raw]
 
-    cleaned = []
-    for tw in texts:
-        bits = []
-        for w in tw.split():
-            w = w.strip()
-            if not w:
-                continue
-            if w.lower() == "rt":
-                continue
-            if w[0] in {"@", "#"}:
-                continue
-            bits.append(w)
-        cleaned.append(" ".join(bits))
 
-    return cleaned
+def _clean(tw):
+    bits = []
+    for w in tw.split():
+        w = w.strip()
+        if not w:
+            continue
+        if w.lower() == "rt":
+            continue
+        if w[0] in {"@", "#"}:
+            continue
+        bits.append(w)
+    return " ".join(bits)
 
 
-
-
-def _safe_stopwords():
-    try:
-        return set(stopwords.words("english"))
-    except LookupError:
-        return {"the", "and", "of", "to", "a", "in", "for", "on", "with", "by", "from"}
-
-
-def _simple_word_tokens(text):
-    return re.findall(r"[A-Za-z]+(?:'[A-Za-z]+)?", text.lower())
+def get_tweet_data(year):
+    store = langfilter.select(prefilter.select(tweet_store.load(year), prefilter.WINNERS))
+    with tracing.span("clean", items_in=len(store)):
+        return store.map_texts(_clean)
 
 
 
 
 def tweets_contain(category_name, tweets):
-    sw = _safe_stopwords().union({"-", "performance", "comedy", "television"})
-    toks = [t for t in _simple_word_tokens(category_name) if t not in sw]
-
-    if not toks:
+    plan = get_plan(category_name)
+    rx = plan.win_pattern
+    if rx is None:
         return []
 
-    patt = ".*?".join(map(re.escape, toks))
-    rx = re.compile(patt, re.IGNORECASE)
-
     hits = [t for t in tweets if rx.search(t)]
 
-    if "act" not in category_name.lower():
+    if not plan.mentions_act:
         hits = [x for x in hits if "act" not in x.lower()]
 
     return hits
@@ -94,75 +60,46 @@ def tweets_contain(category_name, tweets):
 
 
 
-def get_NNP(tweets_list):
-    counter = Counter()
-    for tw in tweets_list:
-        toks = _simple_word_tokens(tw)
-        try:
-            pos = nltk.pos_tag(toks)
-            for w, tag in pos:
-                if tag in ("NNP", "NNPS"):
-                    counter[w.lower()] += 1
-        except LookupError:
-            pass
-    return dict(counter)
+def get_NNP(tweets_list, nlp):
+    return dict(tagging.nnp_counts(tweets_list, nlp))
 
 
 
 
 def count_name_mentions(tweets, candidates, fuzzy=False, min_ratio=90):
-    counts = {c: 0 for c in candidates}
+    low = [c.lower() for c in candidates]
+    hits = []
     for t in tweets:
         tl = t.lower()
-        for c in candidates:
-            cl = c.lower()
-            if fuzzy:
-                if fuzz.partial_ratio(cl, tl) >= min_ratio:
-                    counts[c] += 1
-            else:
-                if cl in tl:
-                    counts[c] += 1
-    return counts
+        if fuzzy:
+            tracing.count("fuzzy.comparisons", len(low))
+            hits.extend(i for i, cl in enumerate(low) if fuzz.partial_ratio(cl, tl) >= min_ratio)
+        else:
+            hits.extend(i for i, cl in enumerate(low) if cl in tl)
+    counts = vocab.count(hits, len(candidates))
+    return dict(zip(candidates, counts.tolist()))
 
 
 
 
 def get_person_names(tweets, nlp):
     names = set()
-
-    m = Matcher(nlp.vocab)
-    pat = [{"POS": "PROPN"}, {"POS": "PROPN", "OP": "?"}]
-    try:
-        m.add("FULL_NAME", [pat])
-    except TypeError:
-        m.add("FULL_NAME", None, pat)
-
-    for t in tweets:
-        doc = nlp(t)
-
-        for ent in doc.ents:
-            if ent.label_ == "PERSON":
-                names.add(ent.text)
-
-        for _, s, e in m(doc):
-            names.add(doc[s:e].text)
-
+    for a in tagging.annotate(tweets, nlp):
+        names.update(a.persons)
+        names.update(a.names)
     return list(names)
 
 
 
 
 def remove_category_tokens(category, counts_dict):
-    toks = _simple_word_tokens(category)
-    toks += ["motion", "picture", "golden", "globes", "television", "series", "tv", "mini", "rt"]
+    rx = get_plan(category).win_exclude
+    if rx is None:
+        return counts_dict
 
-    sw = _safe_stopwords()
-    toks = [w for w in toks if w not in sw]
-
-    for t in toks:
-        for k in list(counts_dict.keys()):
-            if t in k.lower():
-                counts_dict[k] = 0
+    for k in list(counts_dict.keys()):
+        if rx.search(k.lower()):
+            counts_dict[k] = 0
 
     return counts_dict
 
@@ -172,60 +109,48 @@ def remove_category_tokens(category, counts_dict):
 def get_top_percent(counts_dict, percentile):
     if not counts_dict:
         return []
-    mx = max(counts_dict.values()) if counts_dict else 0
-    if mx <= 0:
-        return []
-    th = mx * percentile
-    return [k for k, v in counts_dict.items() if v > th]
+    keys = list(counts_dict)
+    vals = np.fromiter(counts_dict.values(), dtype=np.float64, count=len(keys))
+    return [keys[i] for i in vocab.above_fraction(vals, percentile)]
 
 
 
 
-def get_category_nominees(category, tweets, nlp):
-    cat_tweets = tweets_contain(category, tweets)
-
-    if ("actor" in category.lower()) or ("actress" in category.lower()):
+def _count(category, cat_tweets, nlp):
+    if get_plan(category).is_person:
         cands = get_person_names(cat_tweets, nlp)
         counts = count_name_mentions(cat_tweets, cands, fuzzy=False, min_ratio=90)
     else:
-        counts = get_NNP(cat_tweets)
+        counts = get_NNP(cat_tweets, nlp)
+    return remove_category_tokens(category, counts)
 
-    counts = remove_category_tokens(category, counts)
-    noms = get_top_percent(counts, percentile=0.85)
-    return noms
 
+def get_category_nominees(category, tweets, nlp, cat_tweets=None):
+    with tracing.span("category", module="winners", category=category):
+        with tracing.span("filter", items_in=len(tweets)) as sp:
+            if cat_tweets is None:
+                cat_tweets = tweets_contain(category, tweets)
+            sp.set(items_out=len(cat_tweets))
 
+        with tracing.span("count", items_in=len(cat_tweets)) as sp:
+            counts = adaptive.settle(cat_tweets, category, lambda ts: _count(category, ts, nlp), ratio=0.85)
+            noms = get_top_percent(counts, percentile=0.85)
+            sp.set(items_out=len(noms))
+        return noms
 
 
-AWARD_NAMES = [
-    'cecil b. demille award', 'best motion picture - drama',
-    'best performance by an actress in a motion picture - drama',
-    'best performance by an actor in a motion picture - drama',
-    'best motion picture - comedy or musical',
-    'best performance by an actress in a motion picture - comedy or musical',
-    'best performance by an actor in a motion picture - comedy or musical',
-    'best animated feature film', 'best foreign language film',
-    'best performance by an actress in a supporting role in a motion picture',
-    'best performance by an actor in a supporting role in a motion picture',
-    'best director - motion picture', 'best screenplay - motion picture',
-    'best original score - motion picture', 'best original song - motion picture',
-    'best television series - drama',
-    'best performance by an actress in a television series - drama',
-    'best performance by an actor in a television series - drama',
-    'best television series - comedy or musical',
-    'best performance by an actress in a television series - comedy or musical',
-    'best performance by an actor in a television series - comedy or musical',
-    'best mini-series or motion picture made for television',
-    'best performance by an actress in a mini-series or motion picture made for television',
-    'best performance by an actor in a mini-series or motion picture made for television',
-    'best performance by an actress in a supporting role in a series, mini-series or motion picture made for television',
-    'best performance by an actor in a supporting role in a series, mini-series or motion picture made for television'
-]
 
 
+def run_winners(year, mode=None):
+    """mode="cooccur" reads winners off the shared co-occurrence matrix (see cooccur)."""
+    with tracing.span("winners", year=str(year)):
+        if mode == "cooccur":
+            import cooccur
+            return cooccur.winners(year)
+        return _run_winners(year)
 
 
-def run_winners(year):
+def _run_winners(year):
     tweets = get_tweet_data(year)
 
     try:
@@ -240,13 +165,25 @@ def run_winners(year):
 
     if str(year) in {"2013"}:
         categories = AWARD_NAMES
+    build_plans(categories)
+
+    bundle = artifacts.load(year)
+    if bundle is not None:
+        bundle.preload_annotations(nlp)
+
+    routes = {cat: bundle.routed("winners", cat) if bundle is not None else None for cat in categories}
+    guess = None
+    if gazetteer.ENABLED:
+        routes = {cat: tweets_contain(cat, tweets) if r is None else r for cat, r in routes.items()}
+        guess = gazetteer.for_tagging(list(routes.values()), nlp).annotation
 
     out = {}
     sep = " "
 
-    for cat in categories:
-        picks = get_category_nominees(cat, tweets, nlp)
-        out[cat] = sep.join(picks)
+    with tagging.guessing(guess):
+        for cat in categories:
+            picks = get_category_nominees(cat, tweets, nlp, routes[cat])
+            out[cat] = sep.join(picks)
 
     return out
 
@@ -255,7 +192,8 @@ def run_winners(year):
 
 if __name__ == "__main__":
     import sys
-    y = sys.argv[1] if len(sys.argv) > 1 else "2013"
+    args = memprof.cli(sys.argv[1:])
+    y = args[0] if args else "2013"
     res = run_winners(y)
     for k, v in res.items():
         print(f"{k}: {v}")